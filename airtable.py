@@ -0,0 +1,148 @@
+"""
+Airtable Client
+Reads the funding catalog and writes project submissions through the Airtable REST API
+"""
+
+import urllib.parse
+from functools import lru_cache
+
+import requests
+
+from settings import setting
+from tracing import span, traced
+
+
+@lru_cache(maxsize=1)
+def config() -> dict:
+    """Resolve Airtable settings from the environment / Streamlit secrets on first use"""
+    base_id = setting("AIRTABLE_BASE_ID", "appZvlRCnU5NencKj")
+    # AIRTABLE_API_URL points the app at a local stand-in (scripts/loadtest.py)
+    api_url = setting("AIRTABLE_API_URL", "https://api.airtable.com/v0").rstrip("/")
+    return {
+        "api_base": f"{api_url}/{base_id}",
+        "headers": {"Authorization": f"Bearer {setting('AIRTABLE_PAT')}", "Content-Type": "application/json"},
+        "funding_table": setting("AIRTABLE_FUNDING_TABLE", "Funding Programs"),
+        "projects_table": setting("AIRTABLE_PROJECTS_TABLE", "Project Submissions"),
+        # Safety cap on catalog pages (100 records each); 0 downloads the whole table
+        "max_pages": int(setting("AIRTABLE_MAX_PAGES", 0)),
+    }
+
+
+def table_url(table_name: str) -> str:
+    return f"{config()['api_base']}/{urllib.parse.quote(table_name, safe='')}"
+
+
+@traced("airtable.create_submission")
+def create_project_submission(fields: dict) -> str | None:
+    clean_fields = {k: (", ".join(str(v) for v in val) if isinstance(val, list) else str(val)) for k, val in fields.items() if val and val != "Select..."}
+    resp = requests.post(table_url(config()["projects_table"]), headers=config()["headers"], json={"fields": clean_fields})
+    return resp.json().get("id") if resp.status_code == 200 else None
+
+
+@traced("airtable.update_submission")
+def update_project_submission(record_id: str, fields: dict) -> bool:
+    return requests.patch(f"{table_url(config()['projects_table'])}/{record_id}", headers=config()["headers"], json={"fields": fields}).status_code == 200
+
+
+@traced("airtable.trigger_deep_dive")
+def trigger_deep_dive(submission_id: str, program_id: str, program_name: str) -> bool:
+    return update_project_submission(submission_id, {"Deep Dive": program_name, "Deep Dive Status": "pending ", "Top Program ID": program_id})
+
+
+# Fields the scorer and match cards read. Program_Description is the bulk of each record and is
+# fetched separately, only for programs that are displayed (fetch_program_descriptions).
+CATALOG_FIELDS = (
+    "Program_Name", "Funder_Organization", "Eligible_Regions", "Region", "Eligible_Applicants",
+    "Eligible_Project_Types", "Focus_Area", "Themes", "Eligible_Themes", "Project_Stages", "Stage_Preference",
+    "Max_Grant_Amount", "Application_Deadline", "Competitiveness_Level",
+)
+RECORD_BATCH_SIZE = 50  # ids per RECORD_ID() formula, keeping request URLs well under Airtable's limit
+
+
+@traced("airtable.fetch_funding_records")
+def fetch_funding_records(fields: tuple | None = CATALOG_FIELDS) -> list[dict]:
+    """
+    Download every funding program as a flat dict of its fields plus the record id
+
+    Args:
+        fields: Airtable fields to request (fields[] projection); None downloads every field
+
+    Raises:
+        requests.HTTPError: If Airtable rejects a page (e.g. 429 / 5xx), so callers can keep their last good copy
+    """
+    url = table_url(config()["funding_table"])
+    max_pages = config()["max_pages"]
+    all_records, offset, page_count = [], None, 0
+    while True:
+        if max_pages and page_count >= max_pages:
+            print(f"Warning: funding programs truncated at {len(all_records)} records (AIRTABLE_MAX_PAGES={max_pages})")
+            break
+        page_count += 1
+        params = [("fields[]", f) for f in fields or ()] + ([("offset", offset)] if offset else [])
+        with span("airtable.fetch_page", page=page_count, projected=bool(fields)) as page_span:
+            resp = requests.get(url, headers=config()["headers"], params=params)
+            page_span.set(status_code=resp.status_code)
+        if resp.status_code == 422 and fields and offset is None:
+            # A projected field is missing from this base (UNKNOWN_FIELD_NAME): fall back to every field
+            print(f"Warning: field projection rejected, fetching all fields: {resp.text[:200]}")
+            return fetch_funding_records(fields=None)
+        resp.raise_for_status()
+        data = resp.json()
+        for rec in data.get("records", []):
+            record = rec.get("fields", {})
+            record["id"] = rec.get("id")
+            all_records.append(record)
+        offset = data.get("offset")
+        if not offset:
+            break
+    return all_records
+
+
+def fetch_records_by_id(table_name: str, record_ids: list, fields: tuple) -> dict:
+    """
+    Fetch some fields of specific records, batching ids into RECORD_ID() formulas
+
+    Args:
+        table_name: Airtable table holding the records
+        record_ids: Record ids to fetch (RECORD_BATCH_SIZE per request)
+        fields: Fields to request
+
+    Returns:
+        Dict of record id -> fields (records Airtable did not return are omitted)
+
+    Raises:
+        requests.HTTPError: If Airtable rejects a batch
+    """
+    url = table_url(table_name)
+    records = {}
+    for start in range(0, len(record_ids), RECORD_BATCH_SIZE):
+        batch = record_ids[start:start + RECORD_BATCH_SIZE]
+        formula = "OR(" + ",".join(f"RECORD_ID()='{record_id}'" for record_id in batch) + ")"
+        params = [("fields[]", f) for f in fields] + [("filterByFormula", formula)]
+        with span("airtable.fetch_batch", table=table_name, records=len(batch)) as batch_span:
+            resp = requests.get(url, headers=config()["headers"], params=params)
+            batch_span.set(status_code=resp.status_code)
+        resp.raise_for_status()
+        records.update({rec.get("id"): rec.get("fields", {}) for rec in resp.json().get("records", [])})
+    return records
+
+
+def fetch_program_descriptions(program_ids: list) -> dict:
+    """
+    Fetch Program_Description for the programs being displayed
+
+    Returns:
+        Dict of program id -> description (programs without one are omitted)
+    """
+    records = fetch_records_by_id(config()["funding_table"], program_ids, ("Program_Description",))
+    return {program_id: fields["Program_Description"] for program_id, fields in records.items() if fields.get("Program_Description")}
+
+
+def fetch_deep_dive_statuses(submission_ids: list) -> dict:
+    """
+    Fetch Deep Dive and Deep Dive Status for several submissions in one filtered list request per batch
+
+    Returns:
+        Dict of submission id -> {"Deep Dive": ..., "Deep Dive Status": ...} (fields Airtable leaves empty are omitted)
+    """
+    return fetch_records_by_id(config()["projects_table"], submission_ids, ("Deep Dive", "Deep Dive Status"))
@@ -6,7 +6,10 @@ Creates complete mock applications based on user responses to readiness question
 from datetime import datetime
 from typing import Dict
 
+from tracing import traced
 
+
+@traced("documents.generate_sfi_application")
 def generate_sfi_application(user_intake: Dict, responses: Dict, program: Dict) -> str:
     """
     Generate a complete SFI Climate Smart Forestry application example
@@ -0,0 +1,147 @@
+"""
+Cache Layer
+Size-aware LRU/TTL caches shared by every session, with one byte budget per cache
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from catalog_store import CATALOG_TTL_SECONDS
+
+_MB = 1024 * 1024
+
+
+def _budget(name: str, megabytes: int, ttl: int | None) -> tuple[int, int | None]:
+    """(max bytes, ttl seconds or None) for a cache, overridable as CACHE_<NAME>_MB / CACHE_<NAME>_TTL (0 = no TTL)"""
+    max_bytes = int(float(os.getenv(f"CACHE_{name.upper()}_MB", megabytes)) * _MB)
+    ttl = int(os.getenv(f"CACHE_{name.upper()}_TTL", ttl or 0))
+    return max_bytes, ttl or None
+
+
+# name: (default MB, default TTL seconds; None keeps entries until evicted for space)
+CACHE_BUDGETS = {
+    "descriptions": _budget("descriptions", 32, CATALOG_TTL_SECONDS),  # lazily fetched program descriptions, refetched as often as the catalog
+    "templates": _budget("templates", 8, 600),                         # parsed Grant Readiness templates
+    "questions": _budget("questions", 8, 3600),                        # personalized question lists per template + intake
+    "results": _budget("results", 32, 600),                            # ranked MatchResults (deadline points depend on the date)
+    "analysis": _budget("analysis", 4, 3600),                          # Grant Readiness answer quality per question + answer hash
+    "documents": _budget("documents", 8, 3600),                        # rendered templates and applications per input hash
+}
+
+
+def deep_sizeof(obj, _seen: set | None = None) -> int:
+    """Approximate bytes held by an object graph (containers, numpy arrays, DataFrames, plain objects)"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "dtype") and hasattr(obj, "nbytes"):  # numpy arrays: includes the data only if the array owns it
+        return sys.getsizeof(obj)
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):  # DataFrames
+        return int(obj.memory_usage(deep=True).sum())
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(v, seen) for v in obj)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return size + deep_sizeof(vars(obj), seen)
+    return size
+
+
+class SizedCache:
+    """
+    LRU cache bounded by total bytes, with an optional TTL per entry
+
+    Entry sizes are measured once on insert (deep_sizeof, or an explicit nbytes). Inserting
+    evicts least recently used entries until the cache fits its budget; a single entry
+    larger than the whole budget is not stored.
+    """
+
+    def __init__(self, name: str, max_bytes: int, ttl: int | None = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (stored_at, value, bytes)
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[2]
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] >= self.ttl:
+                self._drop(key)
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value, nbytes: int | None = None):
+        nbytes = deep_sizeof(value) if nbytes is None else nbytes
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if nbytes > self.max_bytes:
+                return
+            while self._entries and self._bytes + nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            self._entries[key] = (time.monotonic(), value, nbytes)
+            self._bytes += nbytes
+
+    def get_or_set(self, key, factory):
+        """Cached value for key, computing and storing factory() on a miss"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry (counted as evictions)"""
+        with self._lock:
+            self.stats["evictions"] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def report(self) -> dict:
+        """Counters plus hit rate, entries and current / maximum bytes"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(
+                self.stats,
+                hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+@st.cache_resource
+def caches() -> dict:
+    """Every shared cache by name; "results" is a match_cache.MatchCache"""
+    from match_cache import MatchCache
+    registry = {name: SizedCache(name, max_bytes, ttl) for name, (max_bytes, ttl) in CACHE_BUDGETS.items() if name != "results"}
+    registry["results"] = MatchCache(*CACHE_BUDGETS["results"])
+    return registry
+
+
+def get_cache(name: str) -> SizedCache:
+    return caches()[name]
@@ -0,0 +1,400 @@
+"""
+Funding Catalog
+Immutable, precomputed view of the Airtable funding programs used for scoring
+"""
+
+import hashlib
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from regions import ancestors, resolve_regions
+from text_index import TextIndex
+
+
+DEADLINE_FORMATS = ["%B %d, %Y", "%Y-%m-%d", "%m/%d/%Y", "%b %d, %Y"]
+
+# Bit count for every possible byte, used when numpy has no bitwise_count (numpy < 2.0)
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def as_list(value):
+    return [str(v) for v in value] if isinstance(value, list) else ([value] if isinstance(value, str) else [])
+
+
+def parse_number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").replace("$", "")) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def parse_deadline_date(deadline_str) -> datetime | None:
+    """Parse an Airtable deadline string; None for rolling, blank or unrecognised deadlines"""
+    if not isinstance(deadline_str, str) or not deadline_str or deadline_str == "—" or "rolling" in deadline_str.lower():
+        return None
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(deadline_str.strip(), fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_deadline(deadline_str: str) -> int:
+    deadline = parse_deadline_date(deadline_str)
+    return 999 if deadline is None else max(0, (deadline - datetime.now()).days)
+
+
+def popcount(masks: np.ndarray) -> np.ndarray:
+    """Number of set bits per row of a (programs x words) uint64 mask array"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).sum(axis=1, dtype=np.int64)
+    return _BYTE_POPCOUNT[masks.view(np.uint8)].reshape(len(masks), -1).sum(axis=1, dtype=np.int64)
+
+
+class Vocabulary:
+    """Interns lowercased terms to bit positions so term sets can be stored as bitmasks"""
+
+    def __init__(self):
+        self.bits = {}
+
+    def __len__(self):
+        return len(self.bits)
+
+    @property
+    def n_words(self) -> int:
+        return max(1, (len(self.bits) + 63) // 64)
+
+    def intern(self, terms) -> int:
+        """Add terms to the vocabulary and return their combined mask"""
+        mask = 0
+        for term in terms:
+            mask |= 1 << self.bits.setdefault(term.lower(), len(self.bits))
+        return mask
+
+    def mask_of(self, terms) -> int:
+        """Mask of the given terms, ignoring terms no program uses"""
+        mask = 0
+        for term in terms:
+            bit = self.bits.get(term.lower())
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def mask_where(self, predicate) -> int:
+        """Mask of every interned term matching predicate(term)"""
+        mask = 0
+        for term, bit in self.bits.items():
+            if predicate(term):
+                mask |= 1 << bit
+        return mask
+
+    def pack(self, mask: int) -> np.ndarray:
+        """Split a Python int mask into little-endian uint64 words"""
+        return np.array([(mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(self.n_words)], dtype=np.uint64)
+
+    def pack_all(self, masks: list) -> np.ndarray:
+        packed = np.zeros((len(masks), self.n_words), dtype=np.uint64)
+        for i, mask in enumerate(masks):
+            packed[i] = self.pack(mask)
+        return packed
+
+
+class TermSets:
+    """
+    Per-program term sets for one field
+
+    Stored as rows of a packed bitmask array for scoring, plus an inverted index
+    (term bit -> program positions) for pruning the catalog before scoring.
+    """
+
+    def __init__(self, term_lists: list):
+        self.vocab = Vocabulary()
+        masks = [self.vocab.intern(terms) for terms in term_lists]
+        self.masks = self.vocab.pack_all(masks)
+        self.present = self.masks.any(axis=1)
+        self.open_rows = np.flatnonzero(~self.present)
+
+        postings = [[] for _ in range(len(self.vocab))]
+        for row, mask in enumerate(masks):
+            while mask:
+                bit = mask.bit_length() - 1
+                postings[bit].append(row)
+                mask ^= 1 << bit
+        self.postings = [np.array(rows, dtype=np.intp) for rows in postings]
+
+    def overlap(self, mask: int, rows=None) -> np.ndarray:
+        """Count of each program's terms that are also in mask (optionally only for rows)"""
+        masks = self.masks if rows is None else self.masks[rows]
+        return popcount(masks & self.vocab.pack(mask))
+
+    def intersects(self, mask: int, rows=None) -> np.ndarray:
+        masks = self.masks if rows is None else self.masks[rows]
+        return (masks & self.vocab.pack(mask)).any(axis=1)
+
+    def has_terms(self, rows=None) -> np.ndarray:
+        return self.present if rows is None else self.present[rows]
+
+    def rows_with(self, mask: int, include_open: bool = True) -> np.ndarray:
+        """
+        Sorted positions of programs listing any term in mask
+
+        Args:
+            mask: Term mask from the vocabulary
+            include_open: Also return programs that list no terms for this field (no restriction)
+        """
+        lists = [self.postings[bit] for bit in range(mask.bit_length()) if mask >> bit & 1]
+        if include_open:
+            lists.append(self.open_rows)
+        return np.unique(np.concatenate(lists)) if lists else np.empty(0, dtype=np.intp)
+
+
+def rows_to_bitmap(rows, size: int) -> np.ndarray:
+    """Program positions as a bitmap of ceil(size / 64) uint64 words (bit i = program i)"""
+    bits = np.zeros(-(-size // 64) * 64, dtype=bool)
+    bits[np.asarray(rows, dtype=np.intp)] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def bitmap_rows(bitmap: np.ndarray, size: int) -> np.ndarray:
+    """Sorted program positions set in a bitmap"""
+    return np.flatnonzero(np.unpackbits(bitmap.view(np.uint8), bitorder="little")[:size])
+
+
+def bitmap_count(bitmap: np.ndarray) -> int:
+    return int(popcount(bitmap[None, :])[0])
+
+
+class FacetIndex:
+    """
+    One bitmap per distinct value of a program field, for faceted filtering
+
+    Values selected within a facet are OR-ed and facets are AND-ed, so any combination
+    of selections costs a few word-wise operations over ceil(programs / 64) words.
+    """
+
+    def __init__(self, value_lists: list):
+        self.size = len(value_lists)
+        rows_by_value = {}
+        for row, values in enumerate(value_lists):
+            for value in {v.strip() for v in values if v.strip()}:
+                rows_by_value.setdefault(value, []).append(row)
+        self.bitmaps = {value: rows_to_bitmap(rows, self.size) for value, rows in sorted(rows_by_value.items(), key=lambda kv: kv[0].lower())}
+
+    def values(self) -> list:
+        return list(self.bitmaps)
+
+    def select(self, values) -> np.ndarray:
+        """Bitmap of programs listing any of the values"""
+        bitmap = rows_to_bitmap([], self.size)
+        for value in values:
+            if value in self.bitmaps:
+                bitmap = bitmap | self.bitmaps[value]
+        return bitmap
+
+    def counts(self, within: np.ndarray | None = None) -> dict:
+        """Programs per value, optionally only among the programs set in `within`"""
+        return {value: bitmap_count(bitmap if within is None else bitmap & within) for value, bitmap in self.bitmaps.items()}
+
+
+class ListColumn:
+    """
+    A list-valued Airtable field stored as interned value ids plus per-row offsets
+
+    Row i's values are values[ids[offsets[i]:offsets[i + 1]]]; rows where the field was
+    missing are None, not an empty list, so records round-trip unchanged.
+    """
+
+    def __init__(self, cells):
+        interned, ids, offsets, missing = {}, [], [0], []
+        for row, cell in enumerate(cells):
+            if isinstance(cell, list):
+                ids.extend(interned.setdefault(v, len(interned)) for v in cell)
+            else:
+                missing.append(row)
+            offsets.append(len(ids))
+        self.values = list(interned)
+        self.ids = np.array(ids, dtype=np.uint16 if len(interned) < 2**16 else np.uint32)
+        self.offsets = np.array(offsets, dtype=np.int32)
+        self.missing = frozenset(missing)
+
+    def get(self, row: int) -> list | None:
+        if row in self.missing:
+            return None
+        return [self.values[i] for i in self.ids[self.offsets[row]:self.offsets[row + 1]]]
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.offsets.nbytes + sum(sys.getsizeof(v) for v in self.values)
+
+
+def _scalar_list(value) -> bool:
+    """A list of hashable scalars (multi-selects, linked ids), unlike attachment or collaborator lists of dicts"""
+    return isinstance(value, list) and all(isinstance(v, (str, int, float, bool)) for v in value)
+
+
+def compact_frame(df: pd.DataFrame, max_category_ratio: float = 0.5) -> tuple[pd.DataFrame, dict]:
+    """
+    Shrink a raw Airtable DataFrame for long-lived storage
+
+    String columns with repeated values (distinct / present <= max_category_ratio) become
+    categoricals, and columns of scalar lists move out of the frame into ListColumns; every
+    other column (e.g. attachments, which are lists of dicts) stays in the frame unchanged.
+
+    Returns:
+        (compacted DataFrame without the list columns, {column: ListColumn})
+    """
+    scalars, lists = {}, {}
+    for column in df.columns:
+        present = df[column].dropna()
+        if len(present) and present.map(_scalar_list).all():
+            lists[column] = ListColumn(df[column].tolist())
+        elif len(present) and present.map(lambda v: isinstance(v, str)).all() and present.nunique() <= max_category_ratio * len(present):
+            scalars[column] = df[column].astype("category")
+        else:
+            scalars[column] = df[column]
+    return pd.DataFrame(scalars, index=df.index), lists
+
+
+def _today(now: datetime | None = None) -> np.datetime64:
+    return np.datetime64((now or datetime.now()).date(), "s")
+
+
+class DeadlineCalendar:
+    """
+    Program positions indexed by deadline for date-range queries
+
+    Dated programs are kept sorted by deadline, so any window is two binary searches.
+    Rolling programs (no parseable deadline) are kept apart: they are open in every
+    window and only the caller knows whether it wants them.
+    """
+
+    def __init__(self, deadlines: np.ndarray):
+        dated = ~np.isnat(deadlines)
+        order = np.argsort(deadlines[dated], kind="stable")
+        self.dated_rows = np.flatnonzero(dated)[order]
+        self.dated_deadlines = deadlines[dated][order]
+        self.rolling_rows = np.flatnonzero(~dated)
+
+    def between(self, start, end=None) -> np.ndarray:
+        """Positions of dated programs with start <= deadline < end (no upper bound if end is None), soonest first"""
+        lo = np.searchsorted(self.dated_deadlines, np.datetime64(start, "s"), side="left")
+        hi = len(self.dated_deadlines) if end is None else np.searchsorted(self.dated_deadlines, np.datetime64(end, "s"), side="left")
+        return self.dated_rows[lo:hi]
+
+    def window(self, min_days: int, max_days: int | None = None, now: datetime | None = None) -> np.ndarray:
+        """Dated programs closing min_days to max_days calendar days from today (inclusive), soonest first"""
+        today = _today(now)
+        end = None if max_days is None else today + np.timedelta64(max_days + 1, "D")
+        return self.between(today + np.timedelta64(min_days, "D"), end)
+
+    def closing_within(self, days: int, now: datetime | None = None) -> np.ndarray:
+        """Dated programs closing between today and `days` days from now, soonest first"""
+        return self.window(0, days, now)
+
+
+def _field(fields: dict, name: str):
+    value = fields.get(name)
+    return None if isinstance(value, float) and np.isnan(value) else value
+
+
+class FundingCatalog:
+    """
+    Funding programs plus the per-program features the scorer needs
+
+    Built once per Airtable load and never mutated, so a single instance can be
+    shared by every session.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Precompute scoring features from the raw Airtable DataFrame
+
+        Args:
+            df: One row per program, columns named after the Airtable fields
+        """
+        records = df.to_dict("records")
+        # Content hash: identical Airtable data yields the same version across reloads
+        self.version = hashlib.sha1(json.dumps(records, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+        self.ids = np.array([_field(r, "id") for r in records], dtype=object)
+        self.positions = {program_id: pos for pos, program_id in enumerate(self.ids)}
+        self.names = np.array([_field(r, "Program_Name") for r in records], dtype=object)
+        self.funders = np.array([_field(r, "Funder_Organization") for r in records], dtype=object)
+
+        region_lists = [as_list(_field(r, "Eligible_Regions") or _field(r, "Region")) for r in records]
+        self.regions = TermSets(region_lists)
+        # Regions pre-resolved against the gazetteer: the ids a program names, and those ids plus their ancestors
+        resolved = [[region_id for term in terms for region_id in resolve_regions(term)] for terms in region_lists]
+        self.region_ids = TermSets(resolved)
+        self.region_scopes = TermSets([sorted(ancestors(ids)) for ids in resolved])
+        self.applicants = TermSets([as_list(_field(r, "Eligible_Applicants")) for r in records])
+        self.project_types = TermSets([as_list(_field(r, "Eligible_Project_Types") or _field(r, "Focus_Area")) for r in records])
+        self.themes = TermSets([as_list(_field(r, "Themes") or _field(r, "Eligible_Themes")) for r in records])
+        self.stages = TermSets([as_list(_field(r, "Project_Stages") or _field(r, "Stage_Preference")) for r in records])
+
+        max_amounts = [parse_number(_field(r, "Max_Grant_Amount")) for r in records]
+        self.max_amounts = np.array([np.nan if amt is None else amt for amt in max_amounts], dtype=np.float64)
+        # Known amounts sorted ascending (NaN sorts last and is cut off) for amount-range queries
+        order = np.argsort(self.max_amounts, kind="stable")
+        known = int((~np.isnan(self.max_amounts)).sum())
+        self.amount_rows, self.amount_sorted = order[:known], self.max_amounts[order[:known]]
+
+        deadlines = [parse_deadline_date(_field(r, "Application_Deadline")) for r in records]
+        self.deadlines = np.array([np.datetime64("NaT") if d is None else np.datetime64(d) for d in deadlines], dtype="datetime64[s]")
+        self.calendar = DeadlineCalendar(self.deadlines)
+
+        # Matches-view facets, keyed by the filter name they serve (original-case values for display)
+        self.facets = {
+            "funders": FacetIndex([[f] if isinstance(f, str) else [] for f in self.funders]),
+            "themes": FacetIndex([as_list(_field(r, "Themes") or _field(r, "Eligible_Themes")) for r in records]),
+            "project_types": FacetIndex([as_list(_field(r, "Eligible_Project_Types") or _field(r, "Focus_Area")) for r in records]),
+        }
+
+        # Kept for record(): repeated strings as categoricals, list fields as interned ids + offsets
+        self.df, self.list_columns = compact_frame(df)
+        self.memory = {
+            "raw_bytes": int(df.memory_usage(deep=True).sum()),
+            "compact_bytes": int(self.df.memory_usage(deep=True).sum()) + sum(c.nbytes() for c in self.list_columns.values()),
+        }
+
+        # Descriptions are present once catalog_store has indexed them (or loaded them up front with TEXT_SEARCH)
+        self.text_index = TextIndex([f"{_field(r, 'Program_Name') or ''} {_field(r, 'Program_Description') or ''}" for r in records])
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def empty(self) -> bool:
+        return self.df.empty
+
+    def record(self, program_id: str) -> dict | None:
+        """All Airtable fields of one program (missing fields dropped), or None if it is not in this catalog"""
+        pos = self.positions.get(program_id)
+        if pos is None:
+            return None
+        fields = {k: v for k, v in self.df.iloc[pos].items() if _field({k: v}, k) is not None}
+        fields.update({k: column.get(pos) for k, column in self.list_columns.items() if column.get(pos) is not None})
+        return fields
+
+    def days_until_deadline(self, now: datetime | None = None, rows=None) -> np.ndarray:
+        """Days left per program, 999 for rolling or unknown deadlines (vectorized parse_deadline)"""
+        now = now or datetime.now()
+        deadlines = self.deadlines if rows is None else self.deadlines[rows]
+        days = np.floor((deadlines - np.datetime64(now)) / np.timedelta64(1, "D"))
+        return np.where(np.isnan(days), 999, np.maximum(days, 0))
+
+    def amount_between(self, low: float | None = None, high: float | None = None) -> np.ndarray:
+        """Positions of programs whose Max_Grant_Amount is within [low, high] (unknown amounts excluded)"""
+        lo = 0 if low is None else np.searchsorted(self.amount_sorted, low, side="left")
+        hi = len(self.amount_sorted) if high is None else np.searchsorted(self.amount_sorted, high, side="right")
+        return np.sort(self.amount_rows[lo:hi])
+
+    def active_rows(self, now: datetime | None = None) -> np.ndarray:
+        """Sorted positions of programs whose deadline is today or later, or rolling"""
+        return np.sort(np.concatenate([self.calendar.between(_today(now)), self.calendar.rolling_rows]))
@@ -0,0 +1,287 @@
+"""
+Catalog Store
+Process-wide access to the shared FundingCatalog, served stale-while-revalidate from Airtable
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+from tracing import traced
+
+try:
+    import fcntl
+except ImportError:  # Windows: no host-wide lock, process-level single-flight still applies
+    fcntl = None
+
+CATALOG_TTL_SECONDS = int(os.getenv("CATALOG_TTL_SECONDS", "300"))
+ERROR_RETRY_SECONDS = 30
+# Load Program_Description with the catalog itself. Off, the first load stays slim and descriptions are indexed on
+# the loader thread right after it (CatalogStore._index_descriptions), so text relevance covers names until then
+TEXT_SEARCH = os.getenv("TEXT_SEARCH", "false").lower() in ("1", "true", "yes")
+CATALOG_CACHE_DIR = Path(os.getenv("CATALOG_CACHE_DIR") or Path(tempfile.gettempdir()) / "fundmatching-catalog")
+
+_MISSING = object()
+
+
+def _build_catalog(records: list):
+    """
+    FundingCatalog for the records, with its whole footprint in memory["total_bytes"]
+
+    The catalog is one object swapped by CatalogStore rather than a SizedCache entry, so it
+    has no budget; it is measured once here, on the loader thread, for ?stats.
+    """
+    import pandas as pd
+    from caches import deep_sizeof
+    from catalog import FundingCatalog
+    catalog = FundingCatalog(pd.DataFrame(records))
+    catalog.memory["total_bytes"] = deep_sizeof(catalog)
+    return catalog
+
+
+@contextmanager
+def host_lock(path: Path):
+    """Exclusive lock shared by every app process on this host (no-op without fcntl)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CatalogStore:
+    """
+    Holds the current FundingCatalog and refreshes it in the background
+
+    Stale-while-revalidate: once a catalog has loaded, callers always get the last
+    good copy immediately while an expired one is refreshed on a background thread.
+    The new catalog is swapped in under the lock only if its content version
+    changed, and a failed refresh leaves the last good catalog in place.
+
+    Refreshes are single-flight: within a process, callers that arrive while a
+    refresh is running share its Future; across processes on the same host, the
+    download runs under a file lock and the first process to download writes a
+    snapshot that the others reuse while it is still fresh.
+    """
+
+    def __init__(self, ttl: int = CATALOG_TTL_SECONDS, cache_dir: Path = CATALOG_CACHE_DIR):
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        self.stats = {"loads": 0, "fetches": 0, "coalesced": 0, "host_reused": 0, "stale_served": 0, "swaps": 0, "errors": 0, "description_fetches": 0, "description_indexes": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-load")
+        self._catalog = None
+        self._source_version = None  # version of the slim catalog the current one was built from
+        self._loaded_at = 0.0
+        self._inflight = None
+        self._inflight_forced = False
+        self._generation = 0
+
+    @property
+    def version(self) -> str | None:
+        return self._catalog.version if self._catalog is not None else None
+
+    def _fresh(self) -> bool:
+        return self._catalog is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def _submit(self, force: bool) -> Future:
+        """Queue a load on the loader thread and make it the in-flight one (caller holds the lock)"""
+        self.stats["loads"] += 1
+        self._generation += 1
+        self._inflight = self._executor.submit(self._load, force, self._generation)
+        self._inflight_forced = force
+        return self._inflight
+
+    def _revalidate(self) -> Future:
+        """Start a refresh unless one is already in flight (caller holds the lock)"""
+        if self._inflight is not None:
+            self.stats["coalesced"] += 1
+            return self._inflight
+        return self._submit(False)
+
+    def start_load(self) -> Future:
+        """Return a Future for the catalog: the current copy if there is one, else the first load"""
+        with self._lock:
+            if self._catalog is None:
+                return self._revalidate()
+            if not self._fresh():
+                self._revalidate()
+                self.stats["stale_served"] += 1
+            ready = Future()
+            ready.set_result(self._catalog)
+            return ready
+
+    def get(self):
+        """Return the current catalog, waiting only if none has loaded yet"""
+        return self.start_load().result()
+
+    def refresh(self) -> Future:
+        """
+        Revalidate against Airtable now, bypassing the host snapshot; the current catalog keeps serving
+
+        A background load already running may reuse the snapshot, so a forced load is queued
+        behind it (there is one loader thread) unless the in-flight load is itself forced.
+        Cached descriptions are dropped too, since catalog versions do not cover them.
+        """
+        from caches import get_cache
+        get_cache("descriptions").clear()
+        with self._lock:
+            if self._inflight is not None and self._inflight_forced:
+                self.stats["coalesced"] += 1
+                return self._inflight
+            return self._submit(True)
+
+    @traced("catalog.load")
+    def _load(self, force: bool, generation: int):
+        import pandas as pd
+        from catalog import FundingCatalog
+        try:
+            records = self._fetch_records(force)
+            if not records and self._catalog is not None and not self._catalog.empty:
+                raise ValueError("Airtable returned no funding programs")
+            catalog = _build_catalog(records)
+        except Exception as e:
+            print(f"Warning: catalog refresh failed, keeping last good catalog: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+                self._finish(generation)
+                if self._catalog is None:
+                    # Nothing to fall back on yet: serve an empty catalog and retry on the next request
+                    self._catalog = FundingCatalog(pd.DataFrame())
+                else:
+                    # Keep the last good catalog and retry after a short back-off instead of on every rerun
+                    self._loaded_at = time.monotonic() - self.ttl + min(self.ttl, ERROR_RETRY_SECONDS)
+                return self._catalog
+        with self._lock:
+            if catalog.version != self._source_version:
+                self._catalog, self._source_version = catalog, catalog.version
+                self.stats["swaps"] += 1
+            self._loaded_at = time.monotonic()
+            self._finish(generation)
+            current = self._catalog
+        if "Program_Description" not in catalog.df and not catalog.empty:
+            # Queued behind this load on the loader thread, so the caller gets the slim catalog now
+            self._executor.submit(self._index_descriptions, records, catalog.version)
+        return current
+
+    @traced("catalog.index_descriptions")
+    def _index_descriptions(self, records: list, source_version: str):
+        """
+        Rebuild a slim catalog with every Program_Description so the text index covers them
+
+        Runs on the loader thread after each load without TEXT_SEARCH, so descriptions are
+        refetched as often as the catalog. The rebuilt catalog is swapped in if no newer
+        load has replaced its source and its version (which hashes the descriptions) changed.
+        """
+        from airtable import fetch_funding_records
+        try:
+            descriptions = {r["id"]: r["Program_Description"] for r in fetch_funding_records(("Program_Description",)) if r.get("Program_Description")}
+            catalog = _build_catalog([dict(r, Program_Description=descriptions[r["id"]]) if r["id"] in descriptions else r for r in records])
+        except Exception as e:
+            print(f"Warning: could not index program descriptions, text relevance covers names only: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return
+        with self._lock:
+            self.stats["description_indexes"] += 1
+            if self._source_version == source_version and catalog.version != self._catalog.version:
+                self._catalog = catalog
+                self.stats["swaps"] += 1
+
+    def _finish(self, generation: int):
+        """Clear the in-flight load unless a newer one was queued behind it (caller holds the lock)"""
+        if generation == self._generation:
+            self._inflight = None
+
+    def descriptions(self, program_ids: list) -> dict:
+        """
+        Program_Description for the given programs, fetched lazily in one batch for any not cached
+
+        Once descriptions are indexed (or with TEXT_SEARCH) they are part of the catalog. Before
+        that they are only downloaded for programs that are displayed or selected and kept in the shared
+        "descriptions" cache (caches.py) under the catalog version. The catalog version leaves
+        descriptions out, so that cache expires entries after CATALOG_TTL_SECONDS and refresh()
+        clears it. A failed fetch returns what is cached so cards still render without a description.
+        """
+        catalog = self._catalog
+        if catalog is None:
+            return {}
+        if "Program_Description" in catalog.df:
+            loaded = {program_id: catalog.record(program_id) or {} for program_id in program_ids}
+            return {program_id: fields["Program_Description"] for program_id, fields in loaded.items() if fields.get("Program_Description")}
+
+        from caches import get_cache
+        cache, found, missing = get_cache("descriptions"), {}, []
+        for program_id in program_ids:
+            description = cache.get((catalog.version, program_id), _MISSING)
+            if description is _MISSING:
+                missing.append(program_id)
+            else:
+                found[program_id] = description
+        if missing:
+            from airtable import fetch_program_descriptions
+            try:
+                fetched = fetch_program_descriptions(missing)
+            except Exception as e:
+                print(f"Warning: could not fetch program descriptions: {e}")
+            else:
+                with self._lock:
+                    self.stats["description_fetches"] += 1
+                # Programs without a description are cached as None so they are not re-requested
+                for program_id in missing:
+                    cache.put((catalog.version, program_id), fetched.get(program_id))
+                    found[program_id] = fetched.get(program_id)
+        return {program_id: description for program_id, description in found.items() if description}
+
+    def _fetch_records(self, force: bool) -> list:
+        from airtable import CATALOG_FIELDS, config, fetch_funding_records
+        fields = CATALOG_FIELDS + ("Program_Description",) if TEXT_SEARCH else CATALOG_FIELDS
+        source = f"{config()['api_base']}/{config()['funding_table']}/{','.join(fields)}"
+        stem = self.cache_dir / f"catalog-{hashlib.sha1(source.encode()).hexdigest()[:10]}"
+        snapshot = stem.with_suffix(".json")
+        with host_lock(stem.with_suffix(".lock")):
+            if not force and snapshot.exists() and time.time() - snapshot.stat().st_mtime < self.ttl:
+                with self._lock:
+                    self.stats["host_reused"] += 1
+                return json.loads(snapshot.read_text())
+            records = fetch_funding_records(fields)
+            with self._lock:
+                self.stats["fetches"] += 1
+            if not records:
+                return records
+            tmp = snapshot.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(records, default=str))
+            os.replace(tmp, snapshot)
+            return records
+
+
+@st.cache_resource
+def catalog_store() -> CatalogStore:
+    return CatalogStore()
+
+
+def start_catalog_load() -> Future:
+    """Start (or join the in-flight) catalog load without blocking"""
+    return catalog_store().start_load()
+
+
+def program_descriptions(program_ids: list) -> dict:
+    """Program_Description by id for programs on screen (fetched on first display)"""
+    return catalog_store().descriptions(program_ids)
+
+
+def load_catalog():
+    """Return the shared catalog, waiting only for the very first load"""
+    return catalog_store().get()
@@ -0,0 +1,190 @@
+"""
+Deep Dive Dispatch
+Queues Deep Dive requests off the UI thread, deduplicated by idempotency key and rate limited
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from tracing import span
+
+# A repeat request for the same (submission, program) inside this window returns the existing job
+DEEP_DIVE_DEDUPE_SECONDS = int(os.getenv("DEEP_DIVE_DEDUPE_SECONDS", "900"))
+# Distinct Deep Dives one submission may request per hour; further requests are refused
+DEEP_DIVE_PER_SUBMISSION_PER_HOUR = int(os.getenv("DEEP_DIVE_PER_SUBMISSION_PER_HOUR", "5"))
+# Deep Dives sent to Airtable per minute across all sessions; the queue waits rather than refusing
+DEEP_DIVE_GLOBAL_PER_MINUTE = int(os.getenv("DEEP_DIVE_GLOBAL_PER_MINUTE", "30"))
+DEEP_DIVE_MAX_ATTEMPTS = 3
+
+QUEUED, SENDING, SENT, FAILED, RATE_LIMITED = "queued", "sending", "sent", "failed", "rate_limited"
+
+
+@dataclass
+class DeepDiveJob:
+    """One Deep Dive request and its local delivery status"""
+    key: str
+    submission_id: str
+    program_id: str
+    program_name: str
+    status: str = QUEUED
+    attempts: int = 0
+    duplicate: bool = False  # set on the copy returned for a deduplicated request
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+
+def idempotency_key(submission_id: str, program_id: str) -> str:
+    return f"{submission_id}:{program_id}"
+
+
+class SlidingWindow:
+    """Event timestamps within the last `seconds`, for count-based rate limits"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.events = deque()
+
+    def count(self, now: float) -> int:
+        while self.events and now - self.events[0] >= self.seconds:
+            self.events.popleft()
+        return len(self.events)
+
+    def wait_time(self, now: float, limit: int) -> float:
+        """Seconds until one more event fits under `limit`"""
+        return 0.0 if self.count(now) < limit else self.events[0] + self.seconds - now
+
+
+class DeepDiveDispatcher:
+    """
+    Process-wide Deep Dive queue with one background sender
+
+    submit() never touches the network: it dedupes by (submission, program) within the
+    dedupe window, refuses a submission past its hourly quota, and queues the rest. The
+    sender paces PATCHes under the global per-minute limit and retries failures (e.g. a
+    429) with exponential backoff, so the automation behind "Deep Dive Status" receives
+    one job per real request.
+    """
+
+    def __init__(self, send=None, on_sent=None, dedupe_seconds: int = DEEP_DIVE_DEDUPE_SECONDS, per_submission: int = DEEP_DIVE_PER_SUBMISSION_PER_HOUR,
+                 global_per_minute: int = DEEP_DIVE_GLOBAL_PER_MINUTE, max_attempts: int = DEEP_DIVE_MAX_ATTEMPTS, retry_seconds: float = 2.0):
+        """
+        Args:
+            send: Callable (submission_id, program_id, program_name) -> bool; defaults to airtable.trigger_deep_dive
+            on_sent: Called with each job once Airtable accepted it (e.g. to start status polling)
+            dedupe_seconds: Window in which a repeat request returns the existing job
+            per_submission: Distinct requests allowed per submission per hour
+            global_per_minute: Sends allowed per minute across every submission
+            max_attempts: Sends tried before a job is marked failed
+            retry_seconds: First retry delay, doubled on each further attempt
+        """
+        self.send = send
+        self.on_sent = on_sent
+        self.dedupe_seconds = dedupe_seconds
+        self.per_submission = per_submission
+        self.global_per_minute = global_per_minute
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.stats = {"requested": 0, "deduplicated": 0, "rate_limited": 0, "sent": 0, "retries": 0, "failed": 0}
+        self._jobs = {}  # idempotency key -> latest DeepDiveJob
+        self._submission_windows = {}  # submission id -> SlidingWindow of accepted requests
+        self._global_window = SlidingWindow(60)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="deep-dive-dispatch", daemon=True).start()
+
+    def submit(self, submission_id: str, program_id: str, program_name: str) -> DeepDiveJob:
+        """
+        Request a Deep Dive without blocking
+
+        Returns:
+            The queued job; a copy of the existing job with duplicate=True inside the dedupe
+            window; or a job with status RATE_LIMITED that was not queued
+        """
+        key, now = idempotency_key(submission_id, program_id), time.time()
+        with span("deep_dive.submit", program_id=program_id) as submit_span, self._lock:
+            self.stats["requested"] += 1
+            existing = self._jobs.get(key)
+            if existing is not None and existing.status != FAILED and now - existing.created_at < self.dedupe_seconds:
+                self.stats["deduplicated"] += 1
+                submit_span.set(outcome="duplicate")
+                return DeepDiveJob(**{**existing.__dict__, "duplicate": True})
+            window = self._submission_windows.setdefault(submission_id, SlidingWindow(3600))
+            if window.count(now) >= self.per_submission:
+                self.stats["rate_limited"] += 1
+                submit_span.set(outcome="rate_limited")
+                return DeepDiveJob(key, submission_id, program_id, program_name, status=RATE_LIMITED)
+            window.events.append(now)
+            job = self._jobs[key] = DeepDiveJob(key, submission_id, program_id, program_name)
+            submit_span.set(outcome="queued", queue_depth=self._queue.qsize())
+        self._queue.put(job)
+        return job
+
+    def job(self, submission_id: str, program_id: str) -> DeepDiveJob | None:
+        """Latest job for this submission and program, if one was requested in this process"""
+        with self._lock:
+            return self._jobs.get(idempotency_key(submission_id, program_id))
+
+    def pending(self) -> list:
+        """Jobs not yet delivered"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.status in (QUEUED, SENDING)]
+
+    def _set_status(self, job: DeepDiveJob, status: str):
+        with self._lock:
+            job.status, job.updated_at = status, time.time()
+
+    def _deliver(self, job: DeepDiveJob) -> bool:
+        send = self.send
+        if send is None:
+            from airtable import trigger_deep_dive as send
+        while True:
+            with self._lock:
+                wait = self._global_window.wait_time(time.time(), self.global_per_minute)
+                if not wait:
+                    self._global_window.events.append(time.time())
+                    job.attempts += 1
+                    break
+            time.sleep(wait)
+        try:
+            return bool(send(job.submission_id, job.program_id, job.program_name))
+        except Exception as e:  # network errors count as a failed attempt
+            print(f"Warning: Deep Dive dispatch failed for {job.key}: {e}")
+            return False
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            self._set_status(job, SENDING)
+            while not self._deliver(job):
+                if job.attempts >= self.max_attempts:
+                    self._set_status(job, FAILED)
+                    self.stats["failed"] += 1
+                    break
+                self.stats["retries"] += 1
+                time.sleep(self.retry_seconds * 2 ** (job.attempts - 1))
+            else:
+                self._set_status(job, SENT)
+                self.stats["sent"] += 1
+                if self.on_sent is not None:
+                    self.on_sent(job)
+            # Old jobs only matter for dedupe; drop them once their window has passed
+            with self._lock:
+                cutoff = time.time() - self.dedupe_seconds
+                for key in [k for k, j in self._jobs.items() if j.status in (SENT, FAILED) and j.created_at < cutoff]:
+                    del self._jobs[key]
+                for submission_id in [s for s, w in self._submission_windows.items() if not w.count(time.time())]:
+                    del self._submission_windows[submission_id]
+
+
+@st.cache_resource
+def deep_dive_dispatcher() -> DeepDiveDispatcher:
+    """The shared dispatcher; delivered jobs are handed to the shared status poller"""
+    from deep_dive_status import deep_dive_poller
+    poller = deep_dive_poller()
+    return DeepDiveDispatcher(on_sent=lambda job: poller.watch(job.submission_id, job.program_name))
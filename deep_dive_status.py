@@ -0,0 +1,141 @@
+"""
+Deep Dive Status
+One background poller that reads "Deep Dive Status" for every pending submission and shares it with all sessions
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+from tracing import span
+
+DEEP_DIVE_POLL_SECONDS = float(os.getenv("DEEP_DIVE_POLL_SECONDS", "15"))
+DEEP_DIVE_POLL_MAX_SECONDS = float(os.getenv("DEEP_DIVE_POLL_MAX_SECONDS", "120"))
+# Submissions still pending after this long stop being polled
+DEEP_DIVE_WATCH_SECONDS = float(os.getenv("DEEP_DIVE_WATCH_SECONDS", "3600"))
+# Statuses the Deep Dive automation reports while it is still working (compared trimmed, lowercase)
+PENDING_STATUSES = frozenset({"", "pending", "queued", "processing", "in progress", "running"})
+
+
+@dataclass
+class DeepDiveStatus:
+    """Last known Deep Dive state of one submission"""
+    submission_id: str
+    program_name: str
+    status: str = "pending"
+    watched_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def pending(self) -> bool:
+        return self.status.strip().lower() in PENDING_STATUSES
+
+
+class DeepDiveStatusPoller:
+    """
+    Polls Airtable for every watched submission with a single RECORD_ID() list request per interval
+
+    Sessions only read the shared in-memory statuses, so Airtable reads grow with the
+    number of pending Deep Dives rather than the number of open sessions. The interval
+    starts at `interval`, stretches by 1.5x while nothing changes and doubles after an
+    error (e.g. a 429), up to `max_interval`; a new watch or a status change resets it.
+    """
+
+    def __init__(self, fetch=None, interval: float = DEEP_DIVE_POLL_SECONDS, max_interval: float = DEEP_DIVE_POLL_MAX_SECONDS, watch_seconds: float = DEEP_DIVE_WATCH_SECONDS):
+        """
+        Args:
+            fetch: Callable (submission ids) -> {id: fields}; defaults to airtable.fetch_deep_dive_statuses
+            interval: Base seconds between polls
+            max_interval: Longest backoff between polls
+            watch_seconds: How long a submission is polled (and its status kept) after it is watched
+        """
+        self.fetch = fetch
+        self.base_interval = interval
+        self.max_interval = max_interval
+        self.watch_seconds = watch_seconds
+        self.interval = interval
+        self.stats = {"polls": 0, "submissions_polled": 0, "updates": 0, "errors": 0}
+        self._statuses = {}  # submission id -> DeepDiveStatus
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="deep-dive-status", daemon=True).start()
+
+    def watch(self, submission_id: str, program_name: str):
+        """Start polling a submission whose Deep Dive was just requested"""
+        with self._lock:
+            self._forget_expired(time.time())
+            self._statuses[submission_id] = DeepDiveStatus(submission_id, program_name)
+            self.interval = self.base_interval
+        self._wake.set()
+
+    def _forget_expired(self, now: float):
+        """Drop submissions watched longer than watch_seconds ago, finished or not"""
+        for submission_id in [s for s, entry in self._statuses.items() if now - entry.watched_at > self.watch_seconds]:
+            del self._statuses[submission_id]
+
+    def status(self, submission_id: str) -> DeepDiveStatus | None:
+        with self._lock:
+            return self._statuses.get(submission_id)
+
+    def pending_ids(self) -> list:
+        with self._lock:
+            return [s for s, status in self._statuses.items() if status.pending]
+
+    def poll(self) -> int:
+        """
+        Fetch every pending submission once
+
+        Returns:
+            Number of submissions whose status changed
+        """
+        ids = self.pending_ids()
+        if not ids:
+            return 0
+        fetch = self.fetch
+        if fetch is None:
+            from airtable import fetch_deep_dive_statuses as fetch
+        with span("deep_dive.poll", submissions=len(ids)) as poll_span:
+            records = fetch(ids)
+            changed, now = 0, time.time()
+            with self._lock:
+                self.stats["polls"] += 1
+                self.stats["submissions_polled"] += len(ids)
+                for submission_id in ids:
+                    status, fields = self._statuses.get(submission_id), records.get(submission_id, {})
+                    # The record names the program whose Deep Dive it is tracking; a stale one is not this request
+                    if status is None or fields.get("Deep Dive", status.program_name) != status.program_name:
+                        continue
+                    value = str(fields.get("Deep Dive Status", status.status))
+                    if value.strip().lower() != status.status.strip().lower():
+                        status.status, status.updated_at = value, now
+                        changed += 1
+                self.stats["updates"] += changed
+                self._forget_expired(now)
+            poll_span.set(changed=changed)
+        return changed
+
+    def _run(self):
+        while True:
+            if not self.pending_ids():
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                changed = self.poll()
+                with self._lock:
+                    self.interval = self.base_interval if changed else min(self.interval * 1.5, self.max_interval)
+            except Exception as e:  # 429 / 5xx / network: back off harder, keep the last known statuses
+                print(f"Warning: Deep Dive status poll failed: {e}")
+                with self._lock:
+                    self.stats["errors"] += 1
+                    self.interval = min(self.interval * 2, self.max_interval)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+@st.cache_resource
+def deep_dive_poller() -> DeepDiveStatusPoller:
+    return DeepDiveStatusPoller()
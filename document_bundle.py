@@ -0,0 +1,98 @@
+"""
+Document Bundle
+Renders the BCR, Chief letter, budget guide, partnership letters and application in one pass into a ZIP
+"""
+
+import hashlib
+import io
+import json
+import re
+import zipfile
+from datetime import date
+
+from application_generator import generate_sfi_application
+from caches import get_cache
+from document_templates import (generate_bcr_template, generate_budget_template, generate_chief_letter_template,
+                                generate_partnership_letter_template)
+from tracing import span, traced
+
+
+def cached_document(name: str, inputs: tuple, render) -> str:
+    """
+    Document text from the "documents" cache, rendered on a miss
+
+    Args:
+        name: Document kind (e.g. "bcr"); part of the key
+        inputs: Everything the text depends on (JSON-serializable); hashed into the key
+        render: Callable () -> str producing the text
+    """
+    digest = hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+    def rendered():
+        with span("documents.render", document=name):
+            return render()
+    return get_cache("documents").get_or_set((name, digest), rendered)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"\W+", "_", text).strip("_")[:40] or "Project"
+
+
+def partner_names(partners: str) -> list:
+    """Partners typed in the intake ("A, B; C", one per line works too) as separate names, one per letter file name"""
+    names = {}
+    for name in re.split(r"[;,\n]", partners or ""):
+        if name.strip():
+            names.setdefault(_slug(name.strip()).lower(), name.strip())
+    return list(names.values())
+
+
+def bcr_document(user_intake: dict, program_name: str) -> str:
+    return cached_document("bcr", (user_intake, program_name), lambda: generate_bcr_template(user_intake, program_name, user_intake.get('project_title', '')))
+
+
+def chief_letter_document(user_intake: dict, program_name: str) -> str:
+    # Letters carry today's date, so the date is part of their inputs
+    return cached_document("chief_letter", (user_intake, program_name, date.today().isoformat()), lambda: generate_chief_letter_template(user_intake, program_name))
+
+
+def partnership_letter_document(user_intake: dict, partner: str) -> str:
+    return cached_document("partnership_letter", (user_intake, partner, date.today().isoformat()), lambda: generate_partnership_letter_template(user_intake, partner))
+
+
+def application_document(user_intake: dict, responses: dict, program: dict) -> str:
+    return cached_document("application", (user_intake, responses, program, date.today().isoformat()), lambda: generate_sfi_application(user_intake, responses, program))
+
+
+def application_file_name(user_intake: dict) -> str:
+    return f"SFI_Application_{user_intake.get('organization', 'Project').replace(' ', '_')}.txt"
+
+
+def bundle_documents(user_intake: dict, responses: dict, program: dict):
+    """
+    Every document for a program, intake and set of responses, each through the "documents" cache
+
+    Yields:
+        (file name, text); one partnership letter per named partner (a blank one if none)
+    """
+    program_name = program.get('Program_Name', 'Funding Program')
+    yield "BCR_Template.txt", bcr_document(user_intake, program_name)
+    yield "Chief_Letter_Template.txt", chief_letter_document(user_intake, program_name)
+    yield "Budget_Template.txt", cached_document("budget", (), generate_budget_template)
+    for partner in partner_names(user_intake.get('partners')) or ["[Partner]"]:
+        yield f"Partnership_Letter_{_slug(partner)}.txt", partnership_letter_document(user_intake, partner)
+    yield application_file_name(user_intake), application_document(user_intake, responses, program)
+
+
+@traced("documents.bundle")
+def build_bundle(user_intake: dict, responses: dict, program: dict) -> bytes:
+    """ZIP (deflated) of bundle_documents, each document written as soon as it is rendered"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for file_name, text in bundle_documents(user_intake, responses, program):
+            bundle.writestr(file_name, text)
+    return buffer.getvalue()
+
+
+def bundle_file_name(user_intake: dict) -> str:
+    return f"Application_Bundle_{_slug(user_intake.get('organization', 'Project'))}.zip"
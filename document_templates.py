@@ -221,10 +221,22 @@ def get_example_responses_by_question() -> Dict[str, Dict]:
     }
 
 
-def get_response_strengthening_tips(question_id: str, user_response: str) -> str:
-    """Provide tips to strengthen responses"""
+def get_response_strengthening_tips(question_id: str, user_response: str, question: Dict = None) -> str:
+    """
+    Provide tips to strengthen responses
+    
+    Args:
+        question_id: Template question ID
+        user_response: The applicant's answer
+        question: Template question with example_strong / why_strong; defaults to get_example_responses_by_question()
+        
+    Returns:
+        Tips one per line, or "" when the answer already covers its strong example's specifics
+    """
+    from response_quality import analyze_response
     
-    if not user_response or len(user_response.split()) < 10:
-        return "💡 Add more detail - aim for 3-5 sentences"
+    if question is None:
+        example = get_example_responses_by_question().get(question_id, {})
+        question = {'id': question_id, 'example_strong': example.get('strong', ''), 'why_strong': example.get('why_strong', '')}
     
-    return ""
+    return "\n".join(f"💡 {tip}" for tip in analyze_response(question, user_response or "").tips)
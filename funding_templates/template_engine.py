@@ -7,6 +7,8 @@ import json
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from tracing import traced
+
 
 class FundingTemplate:
     """Represents a single funding program template with questions and checklist"""
@@ -19,6 +21,7 @@ class FundingTemplate:
         self.program_id = self.data.get('program_id')
         self.program_name = self.data.get('program_name')
     
+    @traced("templates.get_questions")
     def get_questions(self, user_intake: Dict) -> List[Dict]:
         """
         Get relevant questions based on user intake data
@@ -185,12 +188,18 @@ class FundingTemplate:
         """
         Calculate how ready user is to apply based on their responses
         
+        Text answers earn their question's weight scaled by answer quality (length and the
+        specifics its strong example shows; see response_quality), not just a word count.
+        
         Args:
             user_responses: Dict mapping question IDs to user's answers
             
         Returns:
             Readiness score from 0-100
         """
+        # Lazy: response_quality pulls in streamlit through caches
+        from response_quality import cached_analysis
+
         total_weight = sum(q.get('scoring_weight', 10) for q in self.data.get('questions', []))
         earned_weight = 0
         
@@ -199,9 +208,9 @@ class FundingTemplate:
             if q_id in user_responses:
                 response = user_responses[q_id]
                 
-                # Check if response is substantial (at least 5 words for text responses)
-                if isinstance(response, str) and len(response.split()) >= 5:
-                    earned_weight += q.get('scoring_weight', 10)
+                # Text responses: weight scaled by the cached quality analysis (0 below 5 words)
+                if isinstance(response, str):
+                    earned_weight += q.get('scoring_weight', 10) * cached_analysis(self.program_id, q, response).score
                 # For non-text responses (checkboxes, etc), just check if present
                 elif response:
                     earned_weight += q.get('scoring_weight', 10)
@@ -287,6 +296,7 @@ class TemplateManager:
         
         self._load_templates()
     
+    @traced("templates.load")
     def _load_templates(self):
         """Load all JSON templates from directory"""
         if not self.templates_dir.exists():
@@ -3,25 +3,38 @@ Grant Readiness Page
 Shows template-based questions and smart checklist for a specific funding program
 """
 
+import hashlib
+import json
+
 import streamlit as st
+from caches import get_cache
+from catalog_store import load_catalog, program_descriptions
 from funding_templates.template_engine import TemplateManager
 from funding_templates.program_mapper import get_template_id
-from application_generator import generate_sfi_application
-from document_templates import generate_bcr_template, generate_chief_letter_template
+from document_bundle import (application_document, application_file_name, bcr_document, build_bundle, bundle_file_name,
+                             chief_letter_document)
+from response_quality import cached_analysis
+
+
+def cached_questions(template_id: str, template, user_intake: dict) -> list:
+    """Personalized questions for a template and intake, shared through the "questions" cache (treat as read-only)"""
+    intake_hash = hashlib.sha1(json.dumps(user_intake, sort_keys=True, default=str).encode()).hexdigest()
+    return get_cache("questions").get_or_set((template_id, intake_hash), lambda: template.get_questions(user_intake))
 
 
 def show_grant_readiness_page():
     """Display the grant readiness questions and checklist"""
     
-    # Get program details from session state
-    if 'selected_program' not in st.session_state:
+    # Resolve the selected program against the shared catalog
+    program = load_catalog().record(st.session_state['selected_program_id']) if 'selected_program_id' in st.session_state else None
+    if program is None:
         st.error("No program selected. Please go back and select a funding match.")
         if st.button("← Back to matches"):
             st.session_state.page = 'matches'
             st.rerun()
         return
     
-    program = st.session_state['selected_program']
+    program.setdefault('Program_Description', program_descriptions([program['id']]).get(program['id']))
     program_name = program.get('Program_Name', 'Unknown Program')
     
     # Get user intake data
@@ -38,9 +51,8 @@ def show_grant_readiness_page():
             st.rerun()
         return
     
-    # Load template
-    tm = TemplateManager()
-    template = tm.get_template(template_id)
+    # Load template (parsed once and shared through the "templates" cache)
+    template = get_cache("templates").get_or_set("manager", TemplateManager).get_template(template_id)
     
     if not template:
         st.error(f"Could not load template: {template_id}")
@@ -59,7 +71,7 @@ def show_grant_readiness_page():
     )
     
     # Get questions based on user's project
-    questions = template.get_questions(user_intake)
+    questions = cached_questions(template_id, template, user_intake)
     
     # Initialize responses in session state
     if 'readiness_responses' not in st.session_state:
@@ -181,7 +193,7 @@ def show_grant_readiness_page():
         # Generate Application Example button
         if score >= 40:
             if st.button("📄 Generate App", type="primary"):
-                application_text = generate_sfi_application(
+                application_text = application_document(
                     user_intake,
                     st.session_state.readiness_responses,
                     program
@@ -190,7 +202,7 @@ def show_grant_readiness_page():
                 st.download_button(
                     label="💾 Download Application",
                     data=application_text,
-                    file_name=f"SFI_Application_{user_intake.get('organization', 'Project').replace(' ', '_')}.txt",
+                    file_name=application_file_name(user_intake),
                     mime="text/plain"
                 )
         else:
@@ -205,6 +217,18 @@ def show_grant_readiness_page():
             st.session_state.page = 'matches'
             st.rerun()
     
+    # Every document in one ZIP, rendered only on click; unchanged documents come from the "documents" cache
+    responses = dict(st.session_state.readiness_responses)
+    st.download_button(
+        "📦 Download All Documents (ZIP)",
+        data=lambda: build_bundle(user_intake, responses, program),
+        file_name=bundle_file_name(user_intake),
+        mime="application/zip",
+        on_click="ignore",
+        disabled=score < 40,
+        help="BCR, Chief & Council letter, budget guide, partnership letters and the example application"
+    )
+    
     # Show status interpretation
     st.markdown("")
     if score < 40:
@@ -222,7 +246,7 @@ def show_grant_readiness_page():
     
     # Show checklist if toggled
     if st.session_state.get('show_checklist'):
-        show_checklist_section(template, user_intake)
+        show_checklist_section(template, user_intake, program_name)
 
 
 def show_question(q: dict, template_id: str, user_intake: dict, program_name: str):
@@ -244,7 +268,7 @@ def show_question(q: dict, template_id: str, user_intake: dict, program_name: st
             st.info(q['bcr_explainer'])
             # Add BCR template download
             if st.button("📄 Download BCR Template", key=f"bcr_template_{q['id']}"):
-                bcr_text = generate_bcr_template(user_intake, program_name, user_intake.get('project_title', ''))
+                bcr_text = bcr_document(user_intake, program_name)
                 st.download_button(
                     label="💾 Save BCR Template",
                     data=bcr_text,
@@ -310,19 +334,22 @@ def show_question(q: dict, template_id: str, user_intake: dict, program_name: st
         if response:
             st.session_state.readiness_responses[q['id']] = response
             
-            # Word count
-            word_count = len(response.split())
+            # Quality feedback (cached per answer and shared with the readiness score)
+            analysis = cached_analysis(template_id, q, response)
             
             # Give feedback
-            if q.get('required') and word_count < 5:
-                st.caption(f"⚠️ {word_count} words - add more detail (aim for {q.get('expected_length', '3-5 sentences')})")
-            elif word_count < 20:
-                st.caption(f"✓ {word_count} words - good start, consider adding more detail")
+            if analysis.score == 0:
+                st.caption(f"⚠️ {analysis.words} words - add more detail (aim for {q.get('expected_length', '3-5 sentences')})")
+            elif analysis.score < 0.8:
+                st.caption(f"✓ {analysis.words} words · quality {analysis.score:.0%} - good start, make it more specific")
             else:
-                st.caption(f"✓ {word_count} words - comprehensive answer!")
+                st.caption(f"✓ {analysis.words} words · quality {analysis.score:.0%} - strong, specific answer!")
+            if analysis.score:
+                for tip in analysis.tips[:3]:
+                    st.caption(f"💡 {tip}")
 
 
-def show_checklist_section(template, user_intake):
+def show_checklist_section(template, user_intake, program_name):
     """Display the smart checklist with enhanced document help"""
     
     st.markdown("---")
@@ -348,7 +375,7 @@ def show_checklist_section(template, user_intake):
     # Critical items with templates
     st.subheader("🚨 CRITICAL - Must Have Before Submitting")
     for item in checklist['critical']:
-        show_checklist_item(item, user_intake, program_name=st.session_state['selected_program'].get('Program_Name'))
+        show_checklist_item(item, user_intake, program_name=program_name)
     
     # Project-specific
     if checklist['project_specific']:
@@ -425,7 +452,7 @@ def show_checklist_item(item: dict, user_intake: dict, program_name: str = None,
         if item.get('template_available'):
             if 'Band Council Resolution' in item['item']:
                 if st.button("📄 Get BCR Template", key=f"dl_bcr_{item['item']}"):
-                    bcr = generate_bcr_template(user_intake, program_name or "SFI Program", user_intake.get('project_title', ''))
+                    bcr = bcr_document(user_intake, program_name or "SFI Program")
                     st.download_button(
                         "💾 Download BCR",
                         data=bcr,
@@ -436,7 +463,7 @@ def show_checklist_item(item: dict, user_intake: dict, program_name: str = None,
             
             elif 'Letter' in item['item'] and 'Chief' in item['item']:
                 if st.button("📄 Get Letter Template", key=f"dl_letter_{item['item']}"):
-                    letter = generate_chief_letter_template(user_intake, program_name or "SFI Program")
+                    letter = chief_letter_document(user_intake, program_name or "SFI Program")
                     st.download_button(
                         "💾 Download Letter",
                         data=letter,
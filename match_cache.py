@@ -0,0 +1,104 @@
+"""
+Match Cache
+Shares ranked match results across sessions that submit the same scoring inputs against the same catalog
+"""
+
+import hashlib
+import json
+from concurrent.futures import BrokenExecutor
+
+from caches import SizedCache, get_cache
+from tracing import span
+
+# Intake fields read by matching.score_components; name, email and organization do not affect ranking
+SCORING_FIELDS = ("applicant_type", "region", "budget_range", "project_types", "themes", "stage", "project_title", "description", "partners")
+
+
+def intake_key(intake: dict, limit: int, strict: bool, filters: dict | None = None) -> str:
+    """
+    Canonical hash of the scoring-relevant intake fields and ranking options
+
+    Strings are whitespace-trimmed and list fields sorted, so the same answers entered
+    in a different order or with stray spaces share a cache entry.
+    """
+    canonical = {}
+    for field in SCORING_FIELDS:
+        value = intake.get(field)
+        if isinstance(value, (list, tuple)):
+            value = sorted(str(v).strip() for v in value)
+        elif value is not None:
+            value = str(value).strip()
+        canonical[field] = value or None
+    canonical.update(limit=limit, strict=strict, filters=filters or {})
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode()).hexdigest()
+
+
+class MatchCache(SizedCache):
+    """
+    The "results" cache: MatchResults valid for a single catalog version
+
+    Entries expire after the TTL because the deadline component depends on today's
+    date. The whole cache is dropped as soon as a lookup arrives for a new catalog version.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int | None = None):
+        super().__init__("results", max_bytes, ttl)
+        self._version = None
+
+    def _check_version(self, version: str):
+        """Drop every entry when the catalog changed"""
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def get(self, version: str, key: str):
+        with self._lock:
+            self._check_version(version)
+            return super().get(key)
+
+    def put(self, version: str, key: str, result):
+        with self._lock:
+            self._check_version(version)
+            super().put(key, result)
+
+
+def match_cache() -> MatchCache:
+    return get_cache("results")
+
+
+def cached_rank_matches(catalog, intake: dict, limit: int, strict: bool = False, component_cache=None, filters: dict | None = None):
+    """
+    rank_matches through the shared cross-session cache
+
+    Args:
+        catalog: Shared FundingCatalog
+        intake: User intake
+        limit: Number of matches to keep
+        strict: Only score programs the user is hard-eligible for
+        component_cache: Session's matching.ComponentCache, used on a cache miss unless the catalog is
+                         large enough for the sharded worker pool (sharded_scoring)
+        filters: Matches-view filters (see matching.filter_rows)
+
+    Returns:
+        MatchResult, possibly shared with other sessions (treat as read-only)
+    """
+    from matching import rank_matches
+    cache, key = match_cache(), intake_key(intake, limit, strict, filters)
+    with span("scoring.cached_rank", programs=len(catalog), limit=limit, strict=strict, filtered=bool(filters)) as scoring:
+        result = cache.get(catalog.version, key)
+        scoring.set(cache_hit=result is not None)
+        if result is None:
+            from sharded_scoring import SHARD_MIN_PROGRAMS, discard_sharded_scorer, sharded_scorer
+            scorer = sharded_scorer() if len(catalog) >= SHARD_MIN_PROGRAMS else None
+            if scorer is not None:
+                try:
+                    result = scorer.rank(catalog, intake, limit, strict=strict, filters=filters)
+                except BrokenExecutor as e:
+                    # A worker died (e.g. out of memory): score this search in-process and start a new pool next time
+                    print(f"Warning: scoring pool failed, scoring in-process: {e!r}")
+                    discard_sharded_scorer(scorer)
+            if result is None:
+                result = rank_matches(catalog, intake, limit, strict=strict, component_cache=component_cache, filters=filters)
+            cache.put(catalog.version, key, result)
+        scoring.set(candidates=result.total)
+    return result
@@ -0,0 +1,468 @@
+"""
+Match Scoring & Ranking
+Scores the whole funding catalog against a user's intake and selects the top matches
+"""
+
+import numpy as np
+import pandas as pd
+
+from catalog import FundingCatalog, bitmap_rows, rows_to_bitmap
+from regions import ancestors, most_specific, resolve_regions
+from tracing import traced
+
+# Maximum bonus for free-text relevance (BM25 over program name + description, see text_index)
+TEXT_BONUS_POINTS = 10
+# BM25 score that earns half the bonus; points saturate towards TEXT_BONUS_POINTS above it, so one weak
+# term overlap earns a point or two wherever it ranks in the batch
+TEXT_HALF_RELEVANCE = 8.0
+
+def estimate_project_budget(band: str) -> float | None:
+    return {"<$50k": 25_000, "$50–250k": 150_000, "$250k–1M": 500_000, ">1M": 1_500_000}.get(band)
+
+
+def check_keyword_match(user_text: str, program_name: str, funder_name: str) -> int:
+    if not user_text:
+        return 0
+    user_text_lower = user_text.lower()
+    score = 0
+    if program_name:
+        for word in program_name.split():
+            if len(word) <= 6 and word.isupper() and word.lower() in user_text_lower:
+                score += 15
+                break
+        program_words = program_name.lower().split()
+        if len(program_words) >= 3:
+            for i in range(len(program_words) - 2):
+                phrase = " ".join(program_words[i:i+3])
+                if len(phrase) > 12 and phrase in user_text_lower:
+                    score += 12
+                    break
+        for term in ["climate smart", "habitat conservation", "watershed security", "salmon resiliency"]:
+            if term in program_name.lower() and term in user_text_lower:
+                score += 8
+    if funder_name and len(funder_name) > 3 and funder_name.lower() in user_text_lower:
+        score += 7
+    return min(score, 25)
+
+
+def _overlap_score(term_sets, user_terms, full_points: int, open_points: int, rows=None) -> np.ndarray:
+    """Points for the share of the user's terms a program lists; open_points when it lists none"""
+    user_set = {t.lower() for t in user_terms} if user_terms else set()
+    present = term_sets.has_terms(rows)
+    if not user_set:
+        return np.where(present, 0, open_points)
+    overlap = term_sets.overlap(term_sets.vocab.mask_of(user_set), rows)
+    return np.where(present, (full_points * np.minimum(1.0, overlap / len(user_set))).astype(int), open_points)
+
+
+def _region_masks(catalog: FundingCatalog, region_norm: str) -> tuple[int, int, int]:
+    """
+    Masks selecting programs by how their regions relate to the user's
+
+    A program covers the user when it names the user's region or anything containing it
+    (region_ids vs. the user's ancestors); region strings the gazetteer does not know fall
+    back to substring matching on the raw text. A program that names only a region inside
+    the user's (region_scopes vs. the user's most specific ids, so "Sooke, BC" is treated
+    as Sooke rather than all of BC) may not reach the user's location.
+
+    Returns:
+        (covering mask over region_ids, inside mask over region_scopes, raw mask over regions)
+    """
+    user_ids = resolve_regions(region_norm)
+    raw_mask = catalog.regions.vocab.mask_where(lambda r: (not user_ids or not resolve_regions(r)) and (region_norm in r or r in region_norm))
+    return catalog.region_ids.vocab.mask_of(ancestors(user_ids)), catalog.region_scopes.vocab.mask_of(most_specific(user_ids)), raw_mask
+
+
+def _region_hits(catalog: FundingCatalog, region_norm: str, rows=None) -> tuple[np.ndarray, np.ndarray]:
+    """(covers the user's region, names only a region inside it) for each program"""
+    covering_mask, inside_mask, raw_mask = _region_masks(catalog, region_norm)
+    covering = catalog.region_ids.intersects(covering_mask, rows) | catalog.regions.intersects(raw_mask, rows)
+    return covering, catalog.region_scopes.intersects(inside_mask, rows) & ~covering
+
+
+def _region_rows(catalog: FundingCatalog, region_norm: str) -> np.ndarray:
+    """Positions of programs covering the user's region or listing no region; sub-region programs are left out"""
+    covering_mask, _, raw_mask = _region_masks(catalog, region_norm)
+    return np.union1d(catalog.region_ids.rows_with(covering_mask, include_open=False),
+                      catalog.regions.rows_with(raw_mask, include_open=True))
+
+
+def _applicant_mask(catalog: FundingCatalog, applicant_norm: str) -> int:
+    return catalog.applicants.vocab.mask_where(lambda a: applicant_norm in a)
+
+
+def eligible_rows(catalog: FundingCatalog, intake: dict) -> np.ndarray:
+    """
+    Positions of programs the user is hard-eligible for, found via the catalog's inverted indexes
+
+    A program is kept when it accepts the user's applicant type (or lists no applicant
+    restriction), covers the user's region (or lists none), and its deadline has not passed.
+
+    Args:
+        catalog: Shared FundingCatalog
+        intake: User intake (applicant_type, region, ...)
+
+    Returns:
+        Sorted catalog positions to score
+    """
+    rows = catalog.applicants.rows_with(_applicant_mask(catalog, (intake.get("applicant_type") or "").lower()))
+    region_norm = (intake.get("region") or "").strip().lower()
+    if region_norm:
+        rows = np.intersect1d(rows, _region_rows(catalog, region_norm), assume_unique=True)
+    return np.intersect1d(rows, catalog.active_rows(), assume_unique=True)
+
+
+# Matches-view deadline filter: label -> (min, max) calendar days from today, or "rolling" for programs with no deadline
+DEADLINE_WINDOWS = {
+    "Any time": None,
+    "Closing within 30 days": (0, 30),
+    "31–90 days out": (31, 90),
+    "More than 90 days out": (91, None),
+    "Rolling / no deadline": "rolling",
+}
+
+
+# Amount facet stops for Max_Grant_Amount; the last stop means "and above"
+AMOUNT_STOPS = [0, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000]
+
+# Multi-value facets backed by FundingCatalog.facets
+FACETS = ("funders", "themes", "project_types")
+
+
+def _filter_bitmaps(catalog: FundingCatalog, filters: dict) -> dict:
+    """Bitmap of the programs passing each active filter, keyed by filter name"""
+    size, bitmaps = len(catalog), {}
+    window = DEADLINE_WINDOWS.get(filters.get("deadline"))
+    if window is not None:
+        rows = catalog.calendar.rolling_rows if window == "rolling" else catalog.calendar.window(*window)
+        bitmaps["deadline"] = rows_to_bitmap(rows, size)
+    for facet in FACETS:
+        if filters.get(facet):
+            bitmaps[facet] = catalog.facets[facet].select(filters[facet])
+    low, high = filters.get("amount") or (AMOUNT_STOPS[0], AMOUNT_STOPS[-1])
+    if (low, high) != (AMOUNT_STOPS[0], AMOUNT_STOPS[-1]):
+        bitmaps["amount"] = rows_to_bitmap(catalog.amount_between(low, None if high == AMOUNT_STOPS[-1] else high), size)
+    return bitmaps
+
+
+def _intersect(bitmaps) -> np.ndarray | None:
+    result = None
+    for bitmap in bitmaps:
+        result = bitmap if result is None else result & bitmap
+    return result
+
+
+def filter_rows(catalog: FundingCatalog, filters: dict | None) -> np.ndarray | None:
+    """
+    Sorted positions of programs passing the matches-view filters
+
+    Args:
+        catalog: Shared FundingCatalog
+        filters: Any of {"deadline": DEADLINE_WINDOWS label, "funders" / "themes" / "project_types": [values],
+                 "amount": (low, high) from AMOUNT_STOPS}
+
+    Returns:
+        Catalog positions, or None when no filter is active
+    """
+    bitmap = _intersect(_filter_bitmaps(catalog, filters or {}).values())
+    return None if bitmap is None else bitmap_rows(bitmap, len(catalog))
+
+
+def facet_counts(catalog: FundingCatalog, filters: dict | None, facet: str) -> dict:
+    """Programs per value of one facet, given every other active filter (so counts show what selecting adds)"""
+    others = _intersect(b for name, b in _filter_bitmaps(catalog, filters or {}).items() if name != facet)
+    return catalog.facets[facet].counts(others)
+
+
+def closing_soon(catalog: FundingCatalog, intake: dict, days: int = 30, limit: int = 5) -> np.ndarray:
+    """Positions of programs the user is eligible for that close within `days`, soonest first"""
+    soon = catalog.calendar.closing_within(days)
+    return soon[np.isin(soon, eligible_rows(catalog, intake))][:limit]
+
+
+def _score_region(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    region_norm = (intake.get("region") or "").strip().lower()
+    if not region_norm:
+        return np.full(_count(catalog, rows), 8)
+    covering, inside = _region_hits(catalog, region_norm, rows)
+    # Programs limited to part of the user's region get partial credit: they may not reach the user
+    return np.where(~catalog.regions.has_terms(rows), 12, np.where(covering, 20, np.where(inside, 10, 0)))
+
+
+def _score_applicant(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    applicant_hit = catalog.applicants.intersects(_applicant_mask(catalog, (intake.get("applicant_type") or "").lower()), rows)
+    return np.where(~catalog.applicants.has_terms(rows), 15, np.where(applicant_hit, 30, 0))
+
+
+def _score_project_types(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    return _overlap_score(catalog.project_types, intake.get("project_types"), 20, 10, rows)
+
+
+def _score_themes(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    return _overlap_score(catalog.themes, intake.get("themes"), 15, 7, rows)
+
+
+def _score_budget(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    proj_budget = estimate_project_budget(intake.get("budget_range"))
+    if not proj_budget:
+        return np.full(_count(catalog, rows), 5)
+    max_amt = catalog.max_amounts if rows is None else catalog.max_amounts[rows]
+    unknown = np.isnan(max_amt) | (max_amt == 0)
+    return np.where(unknown, 5, np.where(proj_budget <= max_amt, 10, np.where(proj_budget <= 1.5 * max_amt, 5, 0)))
+
+
+def _score_stage(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    stage_norm = (intake.get("stage") or "").lower()
+    if not stage_norm:
+        return np.zeros(_count(catalog, rows), dtype=int)
+    return np.where(catalog.stages.intersects(catalog.stages.vocab.mask_where(lambda s: stage_norm in s), rows), 5, 0)
+
+
+def _score_keywords(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    user_text = f"{intake.get('project_title') or ''} {intake.get('description') or ''}".strip()
+    n = _count(catalog, rows)
+    if not user_text:
+        return np.zeros(n, dtype=int)
+    names, funders = (catalog.names, catalog.funders) if rows is None else (catalog.names[rows], catalog.funders[rows])
+    return np.fromiter((check_keyword_match(user_text, name, funder) for name, funder in zip(names, funders)), dtype=int, count=n)
+
+
+def _score_text(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    """Up to TEXT_BONUS_POINTS for BM25 relevance of the project text, saturating at TEXT_HALF_RELEVANCE"""
+    user_text = f"{intake.get('project_title') or ''} {intake.get('description') or ''}"
+    relevance = catalog.text_index.scores(user_text, rows)
+    return np.rint(TEXT_BONUS_POINTS * relevance / (relevance + TEXT_HALF_RELEVANCE)).astype(int)
+
+
+def _score_deadline(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    days = catalog.days_until_deadline(rows=rows)
+    return np.where(days > 90, 3, np.where(days > 30, 2, np.where(days < 14, -5, 0)))
+
+
+def _score_priority(catalog: FundingCatalog, intake: dict, rows) -> np.ndarray:
+    """Program-independent boosts for salmon/watershed themes and Indigenous-led projects"""
+    applicant_type = intake.get("applicant_type")
+    partners = (intake.get("partners") or "").lower()
+    user_themes = {t.lower() for t in intake.get("themes") or []}
+    boost = 3 if any(t in ["salmon habitat", "watershed health"] for t in user_themes) else 0
+    boost += 4 if "first nation" in partners or "indigenous" in partners or applicant_type in ["First Nation", "Indigenous organization"] else 0
+    return np.full(_count(catalog, rows), boost)
+
+
+def _count(catalog: FundingCatalog, rows) -> int:
+    return len(catalog) if rows is None else len(rows)
+
+
+# Score breakdown components, in display order
+SCORE_COMPONENTS = {
+    "region": _score_region,
+    "applicant": _score_applicant,
+    "project_types": _score_project_types,
+    "themes": _score_themes,
+    "budget": _score_budget,
+    "stage": _score_stage,
+    "keywords": _score_keywords,
+    "text": _score_text,
+    "deadline": _score_deadline,
+    "priority": _score_priority,
+}
+
+
+# Intake fields each component reads; None marks components that depend on the date and are always rescored
+COMPONENT_FIELDS = {
+    "region": ("region",),
+    "applicant": ("applicant_type",),
+    "project_types": ("project_types",),
+    "themes": ("themes",),
+    "budget": ("budget_range",),
+    "stage": ("stage",),
+    "keywords": ("project_title", "description"),
+    "text": ("project_title", "description"),
+    "deadline": None,
+    "priority": ("applicant_type", "partners", "themes"),
+}
+
+
+def score_components(catalog: FundingCatalog, intake: dict, rows=None) -> dict:
+    """
+    Score each component of the fit score for programs in the catalog
+
+    Set-overlap components are popcounts over the catalog's interned bitmasks, and
+    user-side lookups (substring matches against the vocabularies) run once per
+    search instead of once per program.
+
+    Args:
+        catalog: Shared FundingCatalog
+        intake: User intake (applicant_type, region, project_types, themes, budget_range,
+                stage, project_title, description, partners)
+        rows: Catalog positions to score (e.g. from eligible_rows); None scores every program
+
+    Returns:
+        Dict of component name -> int16 points per scored program, in catalog / rows order
+    """
+    return {name: score(catalog, intake, rows).astype(np.int16) for name, score in SCORE_COMPONENTS.items()}
+
+
+def total_score(components: dict) -> np.ndarray:
+    """Raw fit score (0-100) from score_components output"""
+    return np.minimum(sum(c.astype(np.float64) for c in components.values()), 100)
+
+
+def score_catalog(catalog: FundingCatalog, intake: dict, rows=None) -> np.ndarray:
+    """Raw fit score (0-100) per scored program, in catalog / rows order"""
+    return total_score(score_components(catalog, intake, rows))
+
+
+def select_top_k(scores, names, k: int) -> np.ndarray:
+    """
+    Pick the positions of the k best programs, ordered like a full sort would be
+
+    Ordering matches sort_values(by=["Score", "Program_Name"], ascending=[False, True]):
+    highest score first, ties broken alphabetically with missing names last.
+
+    Args:
+        scores: Integer fit score per program (array-like, catalog order)
+        names: Program name per program (array-like, catalog order)
+        k: Number of programs to return
+
+    Returns:
+        Array of catalog positions, best match first
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k >= n:
+        candidates = np.arange(n)
+    else:
+        # argpartition finds the k-th best score in O(n); every program tied with it
+        # stays a candidate so the name tie-break below picks the same rows as a full sort
+        kth_score = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= kth_score)
+
+    cand_names = pd.Series(np.asarray(names, dtype=object)[candidates])
+    missing = cand_names.isna().to_numpy()
+    order = np.lexsort((cand_names.fillna("").astype(str).to_numpy(), missing, -scores[candidates]))
+    return candidates[order][:k]
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+class ComponentCache:
+    """
+    One session's per-component score vectors over the programs it ranks
+
+    When the intake is edited and searched again, only components whose intake fields
+    (COMPONENT_FIELDS) changed are rescored; the rest are reused. Vectors cover the whole
+    catalog, or in strict mode only the eligible programs, so pruning still cuts scoring
+    work; they are dropped when the catalog version or that set of programs changes.
+    Costs 2 bytes per program per component.
+    """
+
+    def __init__(self):
+        self.catalog_version = None
+        self.scope = None
+        self.inputs = {}
+        self.components = {}
+        self.last_rescored = []
+
+    def components_for(self, catalog: FundingCatalog, intake: dict, rows: np.ndarray | None = None) -> dict:
+        """
+        Component name -> int16 points, rescoring only what the intake change affects
+
+        Args:
+            rows: Sorted positions to score (e.g. eligible_rows); None scores every program
+        """
+        scope = None if rows is None else rows.tobytes()
+        if catalog.version != self.catalog_version or scope != self.scope:
+            self.catalog_version, self.scope, self.inputs, self.components = catalog.version, scope, {}, {}
+        rescored = []
+        for name, score in SCORE_COMPONENTS.items():
+            fields = COMPONENT_FIELDS[name]
+            inputs = None if fields is None else tuple(_freeze(intake.get(f)) for f in fields)
+            if fields is None or name not in self.components or self.inputs[name] != inputs:
+                self.components[name] = score(catalog, intake, rows).astype(np.int16)
+                self.inputs[name] = inputs
+                rescored.append(name)
+        self.last_rescored = rescored
+        return self.components
+
+
+class MatchResult:
+    """
+    Ranked matches for one search: program ids, scores and score breakdowns only
+
+    Kept in session state instead of catalog rows, so per-session memory does not
+    grow with the catalog; rows are looked up in the shared FundingCatalog on render.
+    """
+
+    def __init__(self, catalog_version: str, ids: list, scores: list, breakdowns: list, total: int, strict: bool, filters: dict | None = None):
+        self.catalog_version = catalog_version
+        self.ids = ids
+        self.scores = scores
+        self.breakdowns = breakdowns
+        self.total = total
+        self.strict = strict
+        self.filters = filters or {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def has_more(self) -> bool:
+        return len(self.ids) < self.total
+
+
+def candidate_rows(catalog: FundingCatalog, intake: dict, strict: bool, filters: dict | None, scope: np.ndarray | None = None) -> np.ndarray:
+    """
+    Sorted positions to rank: every program, or those passing strict eligibility and the active filters
+
+    Args:
+        scope: Precomputed eligible_rows (strict) or every position, to avoid computing it twice
+    """
+    rows = scope if scope is not None else eligible_rows(catalog, intake) if strict else np.arange(len(catalog))
+    within = filter_rows(catalog, filters)
+    return rows if within is None else np.intersect1d(rows, within, assume_unique=True)
+
+
+@traced("scoring.rank_matches")
+def rank_matches(catalog: FundingCatalog, intake: dict, limit: int, strict: bool = False, component_cache: ComponentCache | None = None, filters: dict | None = None) -> MatchResult:
+    """
+    Score the catalog for an intake and keep the top matches
+
+    Args:
+        catalog: Shared FundingCatalog
+        intake: User intake
+        limit: Number of matches to keep
+        strict: Only score programs the user is hard-eligible for (see eligible_rows)
+        component_cache: Session's ComponentCache; reuses unchanged components instead of rescoring them
+        filters: Matches-view filters (see filter_rows); only programs passing them are ranked
+
+    Returns:
+        MatchResult with the best `limit` programs, best first
+    """
+    if component_cache is None:
+        rows = candidate_rows(catalog, intake, strict, filters)
+        components = score_components(catalog, intake, rows)
+    else:
+        # Cached vectors cover the eligible programs in strict mode; filters only index into them
+        scope = eligible_rows(catalog, intake) if strict else np.arange(len(catalog))
+        rows = candidate_rows(catalog, intake, strict, filters, scope)
+        components = component_cache.components_for(catalog, intake, scope if strict else None)
+        if len(rows) != len(scope):
+            positions = np.searchsorted(scope, rows)
+            components = {name: points[positions] for name, points in components.items()}
+    scores = np.rint(total_score(components)).astype(int)
+    top = select_top_k(scores, catalog.names[rows], limit)
+    return MatchResult(
+        catalog_version=catalog.version,
+        ids=[str(i) for i in catalog.ids[rows[top]]],
+        scores=[int(s) for s in scores[top]],
+        breakdowns=[{name: int(points[i]) for name, points in components.items()} for i in top],
+        total=len(rows),
+        strict=strict,
+        filters=filters,
+    )
@@ -0,0 +1,112 @@
+"""
+BC Region Gazetteer
+Resolves free-text regions (watersheds, regional districts, areas) to gazetteer ids with a parent hierarchy
+"""
+
+import re
+from functools import lru_cache
+
+# id: (display name, parent id, aliases). Aliases are matched case-insensitively as whole words.
+GAZETTEER = {
+    "canada": ("Canada", None, ["national", "nationwide", "canada-wide", "across canada"]),
+    "bc": ("British Columbia", "canada", ["bc", "b.c.", "province-wide", "provincewide", "provincial", "bc-wide"]),
+
+    # Vancouver Island and its regional districts / watersheds
+    "vancouver-island": ("Vancouver Island", "bc", ["van isle", "vancouver island region"]),
+    "capital-rd": ("Capital Regional District", "vancouver-island", ["crd", "greater victoria", "victoria", "saanich", "sooke", "juan de fuca", "port renfrew"]),
+    "cowichan-valley-rd": ("Cowichan Valley", "vancouver-island", ["cowichan", "cowichan valley regional district", "cvrd", "duncan", "cowichan river", "lake cowichan"]),
+    "nanaimo-rd": ("Regional District of Nanaimo", "vancouver-island", ["nanaimo", "nanaimo river", "parksville", "qualicum", "englishman river"]),
+    "alberni-clayoquot-rd": ("Alberni-Clayoquot", "vancouver-island", ["alberni-clayoquot regional district", "acrd", "port alberni", "alberni", "alberni inlet", "tofino", "ucluelet", "bamfield"]),
+    "barkley-sound": ("Barkley Sound", "alberni-clayoquot-rd", ["barkley", "broken group"]),
+    "sarita-watershed": ("Sarita River", "barkley-sound", ["sarita", "sarita watershed"]),
+    "somass-watershed": ("Somass River", "alberni-clayoquot-rd", ["somass", "somass watershed", "stamp river"]),
+    "clayoquot-sound": ("Clayoquot Sound", "alberni-clayoquot-rd", ["clayoquot"]),
+    "carmanah-walbran": ("Carmanah Walbran", "vancouver-island", ["carmanah", "walbran", "carmanah watershed"]),
+    "comox-valley-rd": ("Comox Valley", "vancouver-island", ["comox", "courtenay", "puntledge", "comox valley regional district"]),
+    "strathcona-rd": ("Strathcona", "vancouver-island", ["campbell river", "quadra island", "sayward", "strathcona regional district"]),
+    "mount-waddington-rd": ("Mount Waddington", "vancouver-island", ["north island", "port hardy", "port mcneill", "regional district of mount waddington"]),
+
+    # Lower Mainland, Sunshine Coast and Sea-to-Sky
+    "lower-mainland": ("Lower Mainland", "bc", ["lower mainland region"]),
+    "metro-vancouver": ("Metro Vancouver", "lower-mainland", ["vancouver", "greater vancouver", "burnaby", "surrey", "richmond", "north shore", "delta"]),
+    "fraser-valley-rd": ("Fraser Valley", "lower-mainland", ["fraser valley regional district", "fvrd", "abbotsford", "chilliwack", "mission"]),
+    "fraser-basin": ("Fraser Basin", "bc", ["fraser river", "fraser watershed", "fraser"]),
+    "sunshine-coast": ("Sunshine Coast", "bc", ["sechelt", "gibsons", "qathet", "powell river"]),
+    "squamish-lillooet": ("Squamish-Lillooet", "bc", ["sea to sky", "sea-to-sky", "squamish", "whistler", "pemberton", "lillooet"]),
+
+    # Southern Interior
+    "interior": ("Southern Interior", "bc", ["bc interior", "southern interior", "interior bc"]),
+    "thompson-okanagan": ("Thompson-Okanagan", "interior", ["thompson okanagan"]),
+    "okanagan": ("Okanagan", "thompson-okanagan", ["okanagan valley", "kelowna", "penticton", "vernon", "central okanagan", "north okanagan", "okanagan-similkameen", "similkameen"]),
+    "thompson-nicola": ("Thompson-Nicola", "thompson-okanagan", ["kamloops", "thompson river", "nicola", "merritt"]),
+    "shuswap": ("Shuswap", "thompson-okanagan", ["columbia shuswap", "salmon arm", "adams river"]),
+    "kootenay": ("Kootenay", "interior", ["kootenays", "east kootenay", "west kootenay", "central kootenay", "columbia basin", "nelson", "cranbrook", "kootenay lake"]),
+    "cariboo": ("Cariboo", "interior", ["cariboo chilcotin", "cariboo-chilcotin", "chilcotin", "williams lake", "quesnel"]),
+
+    # Coast and North
+    "central-coast": ("Central Coast", "bc", ["bella coola", "bella bella", "great bear rainforest"]),
+    "northern-bc": ("Northern BC", "bc", ["northern british columbia", "north bc", "northwest bc"]),
+    "north-coast": ("North Coast", "northern-bc", ["prince rupert"]),
+    "haida-gwaii": ("Haida Gwaii", "northern-bc", ["queen charlotte islands"]),
+    "skeena": ("Skeena", "northern-bc", ["skeena river", "skeena watershed", "terrace", "kitimat", "hazelton", "bulkley", "bulkley valley", "smithers"]),
+    "nechako": ("Nechako", "northern-bc", ["nechako river", "vanderhoof", "fort st. james", "fort st james"]),
+    "fraser-fort-george": ("Fraser-Fort George", "northern-bc", ["prince george", "regional district of fraser-fort george"]),
+    "northeast-bc": ("Northeast BC", "northern-bc", ["peace", "peace river", "peace region", "fort st. john", "fort st john", "dawson creek", "northeast"]),
+}
+
+
+def _build_containment() -> dict:
+    """Map each region id to itself plus every ancestor (the region-containment table)"""
+    table = {}
+    for region_id in GAZETTEER:
+        chain, current = [], region_id
+        while current is not None:
+            chain.append(current)
+            current = GAZETTEER[current][1]
+        table[region_id] = frozenset(chain)
+    return table
+
+
+REGION_ANCESTORS = _build_containment()
+
+
+def _build_aliases() -> dict:
+    """Map every lowercased name, id and alias to its region id"""
+    aliases = {}
+    for region_id, (name, _, extra) in GAZETTEER.items():
+        for alias in [name, region_id.replace("-", " ")] + extra:
+            aliases.setdefault(alias.lower(), region_id)
+    return aliases
+
+
+_ALIASES = _build_aliases()
+
+# Longest aliases first so "vancouver island" wins over "vancouver" at the same position
+_ALIAS_PATTERN = re.compile(
+    r"(?<![a-z0-9])(" + "|".join(re.escape(a) for a in sorted(_ALIASES, key=len, reverse=True)) + r")(?![a-z0-9])"
+)
+
+
+@lru_cache(maxsize=4096)
+def resolve_regions(text: str) -> frozenset:
+    """
+    Find every gazetteer region named in a free-text region string
+
+    Args:
+        text: Region as typed by a user or listed on a program (e.g. "Barkley Sound")
+
+    Returns:
+        Set of gazetteer ids (empty if nothing is recognised)
+    """
+    normalized = " ".join((text or "").lower().replace("–", "-").split())
+    return frozenset(_ALIASES[m] for m in _ALIAS_PATTERN.findall(normalized))
+
+
+def ancestors(region_ids) -> frozenset:
+    """Region ids plus everything that contains them"""
+    return frozenset().union(*(REGION_ANCESTORS[r] for r in region_ids))
+
+
+def most_specific(region_ids) -> frozenset:
+    """Region ids minus any that contains another of them ("Sooke, BC" keeps Capital RD, drops BC)"""
+    return frozenset(r for r in region_ids if not any(other != r and r in REGION_ANCESTORS[other] for other in region_ids))
@@ -0,0 +1,109 @@
+"""
+Response Quality
+Scores Grant Readiness answers against the specifics each question's strong example shows
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+
+from caches import get_cache
+
+# Answers shorter than this earn nothing (the old "substantial answer" cut-off)
+MIN_WORDS = 5
+# Length target when a question has no strong example; otherwise half the strong example's length
+DEFAULT_TARGET_WORDS = 15
+# Share of the score from covering the expected specifics; the rest comes from length
+SIGNAL_WEIGHT = 0.6
+
+# name: (what to add, pattern); compiled once and shared by every analysis
+SIGNALS = {
+    "area": ("hectares or other areas (e.g. \"500 hectares\")", re.compile(
+        r"\b\d[\d,.]*\+?\s*(?:ha|hectares?|acres?|km2|km²)\b", re.I)),
+    "date": ("dates or timing (e.g. \"June 2025\", \"Q3\")", re.compile(
+        r"\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+(?:\d{1,2},?\s+)?(?:19|20)\d{2}"
+        r"|q[1-4]|(?:19|20)\d{2}|year\s+\d|\d+[- ](?:day|week|month|year)s?)\b", re.I)),
+    "money": ("dollar amounts (e.g. \"$45,000\")", re.compile(
+        r"\$\s?\d[\d,]*(?:\.\d+)?(?:\s*(?:k|m|million|thousand)\b)?", re.I)),
+    "tenure": ("the named tenure (e.g. \"Community Forest Agreement\", \"TFL 44\")", re.compile(
+        r"\b(?:community forest(?: agreement)?|cfa|first nations? woodland licen[cs]e|fnwl|tree farm licen[cs]e|tfl(?:\s*\d+)?"
+        r"|woodlot(?: licen[cs]e)?|forest licen[cs]e|timber sale licen[cs]e|tsl|forestry licen[cs]e to cut|fltc"
+        r"|indian reserve|reserve lands?|ir\s?\d+|treaty (?:settlement )?lands?|fee simple)\b", re.I)),
+    "bcr": ("the BCR number or date passed (e.g. \"BCR 2025-014\")", re.compile(
+        r"\b(?:bcr|band council resolution)\s*(?:no\.?|number|#)?\s*[:#-]?\s*\d[\d/-]*", re.I)),
+    "credential": ("staff credentials or experience (e.g. \"RPF\", \"15 years\")", re.compile(
+        r"\b(?:rpf|rft|r\.?p\.?bio|p\.?\s?eng|p\.?\s?geo|p\.?\s?ag|ph\.?d|m\.?sc|b\.?sc|certified\s+\w+)\b"
+        r"|\b\d+\+?\s*years?\b[^.\n]{0,40}\bexperience", re.I)),
+    "figures": ("specific numbers (counts, percentages, tonnes)", re.compile(r"\b\d[\d,.]*\b")),
+    "list": ("one item per line (bullets)", re.compile(r"^\s*(?:[•*-]|\d+[.)])\s+\S", re.M)),
+}
+
+# Phrases in `why_strong` that name a specific even when the strong example shows it only loosely
+WHY_CUES = (
+    (re.compile(r"quantif|numbers|data", re.I), "figures"),
+    (re.compile(r"credential", re.I), "credential"),
+    (re.compile(r"month|quarter|timeline|deadline", re.I), "date"),
+    (re.compile(r"geograph", re.I), "area"),
+    (re.compile(r"budget|cost|dollar", re.I), "money"),
+)
+
+
+@dataclass(frozen=True)
+class ResponseAnalysis:
+    """Quality of one answer: score 0-1, specifics found and the ones its strong example has but it lacks"""
+    score: float
+    words: int
+    found: tuple = ()
+    missing: tuple = ()
+    tips: tuple = ()
+
+
+def _strong_example(question: dict) -> str:
+    """The question's example_strong, else its ✅ entry in examples (never the in-progress or not-started ones)"""
+    return question.get('example_strong') or next((ex for ex in question.get('examples') or [] if ex.startswith("✅")), "")
+
+
+def expected_signals(question: dict) -> tuple:
+    """Signals shown by the question's strong example and named in why_strong"""
+    example = _strong_example(question)
+    expected = {name for name, (_, pattern) in SIGNALS.items() if pattern.search(example)}
+    why = question.get('why_strong') or ''
+    expected.update(name for cue, name in WHY_CUES if cue.search(why))
+    return tuple(name for name in SIGNALS if name in expected)
+
+
+def analyze_response(question: dict, answer: str) -> ResponseAnalysis:
+    """
+    Score an answer by length and by coverage of its question's expected specifics
+
+    Args:
+        question: Template question (uses example_strong / the ✅ example, why_strong, expected_length)
+        answer: The applicant's text
+
+    Returns:
+        ResponseAnalysis; score 0 below MIN_WORDS
+    """
+    words = len(answer.split())
+    found = tuple(name for name, (_, pattern) in SIGNALS.items() if pattern.search(answer))
+    expected = expected_signals(question)
+    missing = tuple(name for name in expected if name not in found)
+    tips = [f"Add {SIGNALS[name][0]}" for name in missing]
+
+    strong_words = len((question.get('example_strong') or '').split())
+    target = max(DEFAULT_TARGET_WORDS, strong_words // 2)
+    if words < target:
+        tips.insert(0, f"Add more detail - aim for {question.get('expected_length', '3-5 sentences')}")
+    if words < MIN_WORDS:
+        return ResponseAnalysis(0.0, words, found, missing, tuple(tips))
+
+    length = min(1.0, words / target)
+    coverage = (len(expected) - len(missing)) / len(expected) if expected else length
+    score = (1 - SIGNAL_WEIGHT) * length + SIGNAL_WEIGHT * coverage
+    return ResponseAnalysis(round(score, 3), words, found, missing, tuple(tips))
+
+
+def cached_analysis(template_id: str, question: dict, answer: str) -> ResponseAnalysis:
+    """analyze_response through the "analysis" cache, keyed by (template, question id, answer hash)"""
+    answer_hash = hashlib.sha1(answer.encode()).hexdigest()
+    key = (template_id, question.get('id'), answer_hash)
+    return get_cache("analysis").get_or_set(key, lambda: analyze_response(question, answer))
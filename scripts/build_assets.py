@@ -0,0 +1,62 @@
+"""
+Build Assets
+Resizes and recompresses hero-background.jpg into the responsive variants served from static/
+
+Run after replacing the hero image; the generated files are committed so deploys need no build step.
+Needs Pillow, which the app itself does not use (pip install -r requirements-dev.txt).
+
+Usage:
+    python scripts/build_assets.py [--source hero-background.jpg] [--quality 72]
+"""
+
+import argparse
+from pathlib import Path
+
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = REPO_ROOT / "static"
+# Widths referenced by the media queries in static/app.css (phones, laptops, wide screens)
+HERO_WIDTHS = (480, 960, 1400)
+# Fallback for browsers without WebP, at the middle width only
+FALLBACK_WIDTH = 960
+
+
+def build_hero(source: Path, quality: int) -> list:
+    """
+    Write hero-<width>.webp for each HERO_WIDTHS entry and a progressive hero-<FALLBACK_WIDTH>.jpg
+
+    Returns:
+        (path, bytes) for every file written
+    """
+    written = []
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        for width in HERO_WIDTHS:
+            width = min(width, image.width)
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            path = STATIC_DIR / f"hero-{width}.webp"
+            resized.save(path, "WEBP", quality=quality, method=6)
+            written.append(path)
+            if width == FALLBACK_WIDTH:
+                path = STATIC_DIR / f"hero-{width}.jpg"
+                resized.save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+                written.append(path)
+    return [(path, path.stat().st_size) for path in written]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--source", default=str(REPO_ROOT / "hero-background.jpg"), help="full-size hero image")
+    parser.add_argument("--quality", type=int, default=72, help="WebP/JPEG quality (0-100)")
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    STATIC_DIR.mkdir(exist_ok=True)
+    print(f"{source.name}: {source.stat().st_size / 1024:.0f} KB")
+    for path, size in build_hero(source, args.quality):
+        print(f"  {path.relative_to(REPO_ROOT)}: {size / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Import Time Report
+Measures cold import cost of the app's startup and deferred module groups with `python -X importtime`
+
+Usage:
+    python scripts/importtime_report.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+STARTUP_MODULES = ["streamlit", "dotenv", "funding_templates.program_mapper", "catalog_store"]
+
+# What app.py imports before first paint vs. what it only imports once a page needs it.
+# Deferred groups are measured on top of the startup modules, so they show incremental cost.
+MODULE_GROUPS = {
+    "startup (first paint)": (STARTUP_MODULES, []),
+    "deferred: catalog load": (["airtable", "catalog", "text_index"], STARTUP_MODULES),
+    "deferred: scoring": (["match_cache", "matching"], STARTUP_MODULES),
+    "deferred: grant readiness page": (["grant_readiness_page"], STARTUP_MODULES),
+    "all eager (pre-lazy app.py)": (["streamlit", "pandas", "requests", "dotenv", "grant_readiness_page"], []),
+}
+
+MARKER = "--importtime-report--"
+
+
+def measure(modules: list, preload: list) -> tuple[int, list]:
+    """
+    Import modules in a fresh interpreter and parse the -X importtime output
+
+    Args:
+        modules: Module names to import together
+        preload: Modules imported first and excluded from the measurement
+
+    Returns:
+        (total cumulative microseconds, [(cumulative_us, top-level module), ...] heaviest first)
+    """
+    code = "; ".join([f"import {m}" for m in preload] + [f"import sys; sys.stderr.write('{MARKER}\\n')"] + [f"import {m}" for m in modules])
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed for {modules}:\n{proc.stderr[-2000:]}")
+
+    top_level = []
+    # Interpreter startup and preloaded modules are reported before the marker
+    for line in proc.stderr.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two spaces per level; top-level ones by a single space
+        if not name.startswith("  "):
+            top_level.append((int(cumulative), name.strip()))
+    return sum(us for us, _ in top_level), sorted(top_level, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per group (median is reported)")
+    parser.add_argument("--top", type=int, default=8, help="heaviest top-level imports to list per group")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, median of {args.runs} cold runs\n")
+    print("| Module group | Modules | Import time (ms) |")
+    print("|---|---|---|")
+    breakdowns = {}
+    for group, (modules, preload) in MODULE_GROUPS.items():
+        runs = [measure(modules, preload) for _ in range(args.runs)]
+        totals = [total for total, _ in runs]
+        breakdowns[group] = runs[totals.index(sorted(totals)[len(totals) // 2])][1]
+        print(f"| {group} | {', '.join(modules)} | {statistics.median(totals) / 1000:.0f} |")
+
+    for group, heaviest in breakdowns.items():
+        print(f"\n{group}:")
+        for us, name in heaviest[:args.top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
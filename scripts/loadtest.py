@@ -0,0 +1,457 @@
+"""
+Load Test
+Drives concurrent simulated sessions through the app (Streamlit AppTest) against a local Airtable stub
+
+Each session fills the intake form one field per rerun, finds matches, optionally requests a
+Deep Dive, opens Grant Readiness, answers the questions and generates the example application.
+The stub serves a synthetic catalog, accepts submissions and completes Deep Dives after a delay,
+with configurable latency and injected 429s.
+
+Usage:
+    python scripts/loadtest.py [--sessions 20] [--concurrency 4] [--programs 500]
+                               [--latency-ms 150] [--jitter 0.3] [--rate-limit 0.02] [--deep-dive] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASE_ID = "appLoadTest"
+FUNDING_TABLE = "Funding Programs"
+PROJECTS_TABLE = "Project Submissions"
+PAGE_SIZE = 100
+
+REGIONS = ["BC", "Province-wide", "Vancouver Island", "Barkley Sound", "Fraser Basin", "Okanagan", "Skeena", "Lower Mainland"]
+APPLICANTS = ["First Nation", "Indigenous organization", "Municipality / Regional District", "Non-profit / Charity", "For-profit business"]
+PROJECT_TYPES = ["Culvert replacement", "Riparian planting", "Instream LWD / channel work", "Forest restoration", "Planning / assessment", "Monitoring"]
+THEMES = ["Climate adaptation", "Salmon habitat", "Watershed health", "Flood resilience", "Wildfire resilience", "Water quality", "Biodiversity"]
+STAGES = ["Idea", "Planning", "Ready to implement", "Shovel-ready"]
+FUNDERS = ["HCTF", "ECCC", "SFI", "Real Estate Foundation", "BC Hydro FWCP", "DFO"]
+DEADLINES = ["Rolling", "2026-12-01", "November 5, 2026", "2027-03-31", "12/15/2026", "—"]
+WORDS = "salmon habitat culvert forest climate wetland restoration monitoring community water riparian watershed".split()
+# Specifics the Grant Readiness quality analyzer looks for, so answers score like a real applicant's
+FACTS = ["across 120 hectares", "starting June 2026", "with $45,000 requested", "under our Community Forest Agreement",
+         "approved by BCR 2025-014", "led by an RPF with 12 years experience", "planting 30,000 seedlings"]
+# Programs with a Grant Readiness template, open to every applicant so sessions can reach that page
+TEMPLATE_PROGRAMS = ["SFI Climate Smart Forestry - Indigenous-Led (ECCC Grant)", "SFI Indigenous-Led Climate Smart Forestry - Round 2"]
+
+
+def synthetic_programs(count: int, seed: int = 0) -> list:
+    """Airtable-shaped funding program records; the first ones carry Grant Readiness templates"""
+    rnd = random.Random(seed)
+    records = []
+    for i in range(count):
+        fields = {
+            "Program_Name": TEMPLATE_PROGRAMS[i] if i < len(TEMPLATE_PROGRAMS) else f"Program {i:05d}",
+            "Funder_Organization": rnd.choice(FUNDERS),
+            "Program_Description": "Funding for " + " ".join(rnd.choice(WORDS) for _ in range(40)),
+            "Application_Deadline": rnd.choice(DEADLINES),
+            "Competitiveness_Level": rnd.choice(["High", "Medium", "Low"]),
+            "Max_Grant_Amount": rnd.choice([50000, 100000, "$250,000", 1000000]),
+        }
+        if i < len(TEMPLATE_PROGRAMS):
+            fields.update(Themes=THEMES, Eligible_Project_Types=PROJECT_TYPES)
+        else:
+            fields.update(
+                Eligible_Regions=rnd.sample(REGIONS, rnd.randint(1, 3)),
+                Eligible_Applicants=rnd.sample(APPLICANTS, rnd.randint(1, 3)),
+                Eligible_Project_Types=rnd.sample(PROJECT_TYPES, rnd.randint(1, 3)),
+                Themes=rnd.sample(THEMES, rnd.randint(1, 3)),
+                Project_Stages=rnd.sample(STAGES, rnd.randint(1, 3)),
+            )
+        records.append({"id": f"rec{i:011d}", "fields": fields})
+    return records
+
+
+class AirtableStub:
+    """
+    Local stand-in for the Airtable REST API (funding list, submission create/update/list)
+
+    Every request waits latency_ms (± jitter) and is rejected with 429 with probability
+    rate_limit, like Airtable's per-base limit. Counters are kept per (method, status).
+    A Deep Dive set to pending is marked "Complete" deep_dive_seconds later, standing in
+    for the automation behind "Deep Dive Status".
+    """
+
+    def __init__(self, programs: list, latency_ms: float = 150, jitter: float = 0.3, rate_limit: float = 0.0, seed: int = 0, deep_dive_seconds: float = 5):
+        self.programs = programs
+        self.latency = latency_ms / 1000
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.deep_dive_seconds = deep_dive_seconds
+        self.submissions = {}
+        self._deep_dives = {}  # submission id -> when its Deep Dive was requested
+        self.stats = Counter()
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v0"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def admit(self, method: str) -> bool:
+        """Apply latency; False when this request is rate limited"""
+        with self._lock:
+            delay = self.latency * (1 + self._rnd.uniform(-self.jitter, self.jitter))
+            limited = self._rnd.random() < self.rate_limit
+        time.sleep(max(delay, 0))
+        return not limited
+
+    def list_programs(self, query: dict) -> dict:
+        fields = set(query.get("fields[]", [])) or None
+        formula = query.get("filterByFormula", [""])[0]
+        if formula:
+            wanted = set(re.findall(r"RECORD_ID\(\)='([^']+)'", formula))
+            page, offset = [r for r in self.programs if r["id"] in wanted], None
+        else:
+            start = int(query.get("offset", ["0"])[0])
+            page = self.programs[start:start + PAGE_SIZE]
+            offset = str(start + PAGE_SIZE) if start + PAGE_SIZE < len(self.programs) else None
+        if fields:
+            page = [{"id": r["id"], "fields": {k: v for k, v in r["fields"].items() if k in fields}} for r in page]
+        return {"records": page, **({"offset": offset} if offset else {})}
+
+    def write_submission(self, record_id: str | None, fields: dict) -> dict | None:
+        with self._lock:
+            if record_id is None:
+                record_id = f"recSUB{len(self.submissions):08d}"
+                self.submissions[record_id] = {}
+            elif record_id not in self.submissions:
+                return None
+            self.submissions[record_id].update(fields)
+            if "Deep Dive Status" in fields:
+                self._deep_dives[record_id] = time.monotonic()
+            return {"id": record_id, "fields": self.submissions[record_id]}
+
+    def list_submissions(self, query: dict) -> dict:
+        fields = set(query.get("fields[]", [])) or None
+        wanted = re.findall(r"RECORD_ID\(\)='([^']+)'", query.get("filterByFormula", [""])[0])
+        records = []
+        with self._lock:
+            for record_id in wanted:
+                if record_id not in self.submissions:
+                    continue
+                requested = self._deep_dives.get(record_id)
+                if requested is not None and time.monotonic() - requested >= self.deep_dive_seconds:
+                    self.submissions[record_id]["Deep Dive Status"] = "Complete"
+                record = self.submissions[record_id]
+                records.append({"id": record_id, "fields": {k: v for k, v in record.items() if fields is None or k in fields}})
+        return {"records": records}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.server.stub.stats[(self.command, status)] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _route(self) -> tuple[str, str | None, dict] | None:
+        """(table, record id or None, query) for /v0/<base>/<table>[/<record>]"""
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if len(parts) < 3 or parts[:2] != ["v0", BASE_ID]:
+            return None
+        return parts[2], (parts[3] if len(parts) > 3 else None), parse_qs(url.query, keep_blank_values=True)
+
+    def _handle(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        stub, route = self.server.stub, self._route()
+        if route is None:
+            return self._respond(404, {"error": "NOT_FOUND"})
+        if not stub.admit(self.command):
+            return self._respond(429, {"errors": [{"error": "RATE_LIMIT_REACHED", "message": "Rate limit exceeded"}]})
+        table, record_id, query = route
+        if self.command == "GET" and table == FUNDING_TABLE:
+            return self._respond(200, stub.list_programs(query))
+        if self.command == "GET" and table == PROJECTS_TABLE:
+            return self._respond(200, stub.list_submissions(query))
+        if table == PROJECTS_TABLE and self.command in ("POST", "PATCH"):
+            record = stub.write_submission(record_id if self.command == "PATCH" else None, body.get("fields", {}))
+            return self._respond(200, record) if record else self._respond(404, {"error": "NOT_FOUND"})
+        return self._respond(404, {"error": "NOT_FOUND"})
+
+    do_GET = do_POST = do_PATCH = _handle
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, on macOS/BSD
+
+
+def share_streamlit_runtime(secrets: dict):
+    """
+    Let AppTest sessions run concurrently in one process, sharing what a server process shares
+
+    AppTest is built for one test at a time: every run installs and then clears a mock
+    Runtime singleton, swaps st.secrets and the config getter in and out, and compiles
+    app.py with a fresh ScriptCache. Here one mock runtime, secrets object, config override
+    and script cache are installed for the whole load test, and AppTest's per-run swaps
+    are made inert so they cannot undo them under a concurrent session.
+    """
+    import contextlib
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    Runtime._instance = runtime
+    app_test.Runtime = type("PerRunRuntime", (Runtime,), {})
+
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+    st.secrets = Secrets()
+    st.secrets._secrets = dict(secrets)
+
+    # The server compiles app.py once per process; without this every measured rerun includes a compile
+    # (and concurrent compiles hit a CPython 3.11 ast thread-safety bug)
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+
+def _labelled(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+class Session:
+    """One simulated user: an AppTest instance walked through the real flow, timing every rerun"""
+
+    def __init__(self, index: int, timeout: float, answers: int, seed: int, deep_dive: bool = False):
+        from streamlit.testing.v1 import AppTest
+        self.index = index
+        self.answers = answers
+        self.deep_dive = deep_dive
+        self.rnd = random.Random(seed + index)
+        self.app = AppTest.from_file(str(REPO_ROOT / "app.py"), default_timeout=timeout)
+        self.timings = defaultdict(list)  # step -> seconds per rerun
+        self.outcome = "completed"
+        self.state_bytes = 0
+
+    def answer(self) -> str:
+        """25 random words with a few concrete specifics mixed in"""
+        return " ".join(self.rnd.choice(WORDS) for _ in range(25)) + " " + ", ".join(self.rnd.sample(FACTS, 4)) + "."
+
+    def _run(self, step: str, action=None):
+        if action is not None:
+            action()
+        start = time.perf_counter()
+        self.app.run()
+        self.timings[step].append(time.perf_counter() - start)
+        if self.app.exception:
+            raise RuntimeError(f"{step}: {self.app.exception[0].message}")
+
+    def _intake_actions(self) -> list:
+        at, rnd, i = self.app, self.rnd, self.index
+
+        def choose(label):
+            box = _labelled(at.selectbox, label)
+            box.select(rnd.choice(box.options[1:]))
+
+        def pick(label):
+            box = _labelled(at.multiselect, label)
+            box.set_value(rnd.sample(box.options, 2))
+
+        return [
+            lambda: _labelled(at.text_input, "Organization").input(f"Load Test Society {i}"),
+            lambda: _labelled(at.text_input, "Your name").input(f"Tester {i}"),
+            lambda: _labelled(at.text_input, "Email").input(f"tester{i}@example.org"),
+            lambda: choose("Applicant type"),
+            lambda: _labelled(at.text_input, "Region / Watershed").input(rnd.choice(REGIONS)),
+            lambda: choose("Budget"),
+            lambda: choose("Stage"),
+            lambda: pick("Project type(s)"),
+            lambda: pick("Themes"),
+            lambda: _labelled(at.text_input, "Project title").input("Climate Smart Forestry " + rnd.choice(WORDS)),
+            lambda: _labelled(at.text_area, "Description").input(" ".join(rnd.choice(WORDS) for _ in range(30))),
+        ]
+
+    def run(self) -> "Session":
+        at = self.app
+        started = time.perf_counter()
+        try:
+            self._run("load")
+            for action in self._intake_actions():
+                self._run("intake", action)
+            self._run("find", lambda: _labelled(at.button, "🔍 Find funding matches").click())
+            deep_dive = [b for b in at.button if b.label == "💧 Deep Dive"]
+            if self.deep_dive and deep_dive:
+                self._run("deep dive", deep_dive[0].click)
+            readiness = [b for b in at.button if b.label == "📋 Grant Readiness" and not b.disabled]
+            if not readiness:
+                self.outcome = f"app error: {at.error[0].value[:60]}" if at.error else "no template match" if at.success else "no matches"
+                return self
+            self._run("grant readiness", readiness[0].click)
+            for _ in range(self.answers or len(at.text_area)):
+                # Questions can appear or disappear as answers come in, so look up the next blank one each time
+                blank = [t for t in at.text_area if t.label == "Your answer:" and not t.value]
+                if not blank:
+                    break
+                self._run("answer", lambda: blank[0].input(self.answer()))
+            generate = [b for b in at.button if b.label == "📄 Generate App"]
+            if not generate or generate[0].disabled:
+                self.outcome = "not ready to generate"
+                return self
+            self._run("generate", generate[0].click)
+            if not any(b.proto.label == "💾 Download Application" for b in at.get("download_button")):
+                self.outcome = "no application"
+        except Exception as e:
+            self.outcome = f"error: {str(e)[:120]}"
+        finally:
+            self.timings["session"].append(time.perf_counter() - started)
+            from caches import deep_sizeof
+            self.state_bytes = deep_sizeof(at.session_state.to_dict())
+        return self
+
+
+def drain_deep_dives(timeout: float) -> dict:
+    """Wait for requested Deep Dives to be sent and reported complete; dispatcher and poller counters"""
+    from deep_dive import deep_dive_dispatcher
+    from deep_dive_status import deep_dive_poller
+    dispatcher, poller, started = deep_dive_dispatcher(), deep_dive_poller(), time.perf_counter()
+    while (dispatcher.pending() or poller.pending_ids()) and time.perf_counter() - started < timeout:
+        time.sleep(0.2)
+    return {"dispatch": dict(dispatcher.stats), "poller": dict(poller.stats), "pending": len(poller.pending_ids()),
+            "drain_seconds": time.perf_counter() - started}
+
+
+def percentiles(seconds: list) -> dict:
+    ms = np.array(seconds) * 1000
+    return {"count": len(ms), "p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95)),
+            "p99": float(np.percentile(ms, 99)), "max": float(ms.max())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20, help="simulated sessions to run")
+    parser.add_argument("--concurrency", type=int, default=4, help="sessions in flight at once")
+    parser.add_argument("--programs", type=int, default=500, help="programs in the stub catalog")
+    parser.add_argument("--latency-ms", type=float, default=150, help="stub latency per Airtable request")
+    parser.add_argument("--jitter", type=float, default=0.3, help="± fraction of random latency variation")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of Airtable requests rejected with 429")
+    parser.add_argument("--answers", type=int, default=0, help="Grant Readiness answers per session (0 = every question)")
+    parser.add_argument("--deep-dive", action="store_true", help="each session requests a Deep Dive on its top match")
+    parser.add_argument("--deep-dive-seconds", type=float, default=5, help="stub delay before a Deep Dive completes")
+    parser.add_argument("--poll-seconds", type=float, default=2, help="DEEP_DIVE_POLL_SECONDS for the run")
+    parser.add_argument("--debounce", type=float, default=0.0, help="PREVIEW_DEBOUNCE_SECONDS for the run (the app default sleeps 0.6 s per edit)")
+    parser.add_argument("--warmup", type=int, default=1, help="sessions run first and excluded (imports, first catalog load)")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    stub = AirtableStub(synthetic_programs(args.programs, args.seed), args.latency_ms, args.jitter, args.rate_limit, args.seed, args.deep_dive_seconds).start()
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, str(REPO_ROOT))
+    os.environ.update(
+        AIRTABLE_API_URL=stub.url, AIRTABLE_BASE_ID=BASE_ID, AIRTABLE_PAT="loadtest",
+        AIRTABLE_FUNDING_TABLE=FUNDING_TABLE, AIRTABLE_PROJECTS_TABLE=PROJECTS_TABLE,
+        CATALOG_CACHE_DIR=tempfile.mkdtemp(prefix="loadtest-catalog-"), PREVIEW_DEBOUNCE_SECONDS=str(args.debounce),
+        DEEP_DIVE_POLL_SECONDS=str(args.poll_seconds),
+    )
+
+    share_streamlit_runtime({"AIRTABLE_PAT": "loadtest"})
+    for i in range(args.warmup):
+        Session(-1 - i, args.timeout, args.answers, args.seed, args.deep_dive).run()
+    stub.stats.clear()
+
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        sessions = list(pool.map(lambda i: Session(i, args.timeout, args.answers, args.seed, args.deep_dive).run(), range(args.sessions)))
+    wall = time.perf_counter() - started
+    rss_after = rss_bytes()  # every session's AppTest is still alive, like open browser tabs
+    deep_dives = drain_deep_dives(args.deep_dive_seconds + 60) if args.deep_dive else {}
+
+    steps = defaultdict(list)
+    for session in sessions:
+        for step, seconds in session.timings.items():
+            steps[step].extend(seconds)
+    outcomes = Counter(session.outcome for session in sessions)
+    reruns = sum(len(seconds) for step, seconds in steps.items() if step != "session")
+    results = {
+        "config": vars(args),
+        "wall_seconds": wall,
+        "sessions_per_second": args.sessions / wall,
+        "reruns_per_second": reruns / wall,
+        "latency_ms": {step: percentiles(seconds) for step, seconds in steps.items()},
+        "outcomes": dict(outcomes),
+        "memory": {
+            "rss_before_mb": rss_before / 1e6,
+            "rss_after_mb": rss_after / 1e6,
+            "rss_per_session_mb": (rss_after - rss_before) / 1e6 / max(args.sessions, 1),
+            "session_state_kb_mean": float(np.mean([s.state_bytes for s in sessions])) / 1e3 if sessions else 0.0,
+        },
+        "airtable": {f"{method} {status}": count for (method, status), count in sorted(stub.stats.items())},
+        "deep_dive": deep_dives,
+    }
+    stub.stop()
+
+    print(f"{args.sessions} sessions, concurrency {args.concurrency}, {args.programs} programs, "
+          f"Airtable {args.latency_ms:.0f} ms ± {args.jitter:.0%}, {args.rate_limit:.0%} 429s\n")
+    print(f"Throughput: {results['sessions_per_second']:.2f} sessions/s, {results['reruns_per_second']:.1f} reruns/s ({wall:.1f} s wall)\n")
+    print("| Step | Reruns | p50 (ms) | p95 (ms) | p99 (ms) | Max (ms) |")
+    print("|---|---|---|---|---|---|")
+    for step, stats in results["latency_ms"].items():
+        print(f"| {step} | {stats['count']} | {stats['p50']:.0f} | {stats['p95']:.0f} | {stats['p99']:.0f} | {stats['max']:.0f} |")
+    memory = results["memory"]
+    print(f"\nMemory: RSS {memory['rss_before_mb']:.0f} → {memory['rss_after_mb']:.0f} MB, "
+          f"{memory['rss_per_session_mb']:.2f} MB per session, session_state {memory['session_state_kb_mean']:.1f} KB mean")
+    print("Outcomes: " + ", ".join(f"{outcome} {count}" for outcome, count in outcomes.most_common()))
+    print("Airtable: " + ", ".join(f"{key} ×{count}" for key, count in results["airtable"].items()))
+    if deep_dives:
+        print(f"Deep Dive: dispatch {deep_dives['dispatch']}, status polling {deep_dives['poller']}, "
+              f"{deep_dives['pending']} still pending after {deep_dives['drain_seconds']:.1f} s")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Trace Report
+Summarizes a TRACE_FILE span log: latency per operation and the slowest sessions
+
+Usage:
+    python scripts/trace_report.py traces.jsonl [--top 10] [--session SESSION_ID]
+"""
+
+import argparse
+import json
+from collections import defaultdict
+
+import numpy as np
+
+
+def load_spans(path: str, session: str | None = None) -> list:
+    """Spans from a JSONL trace file, optionally only one session's"""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                if session is None or record["attributes"].get("session.id") == session:
+                    spans.append(record)
+    return spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("path", help="span file written with TRACE_FILE")
+    parser.add_argument("--top", type=int, default=10, help="slowest sessions to list")
+    parser.add_argument("--session", help="only report spans of this Streamlit session id")
+    args = parser.parse_args()
+
+    spans = load_spans(args.path, args.session)
+    by_name, by_session = defaultdict(list), defaultdict(float)
+    for record in spans:
+        by_name[record["name"]].append(record["duration_ms"])
+        if record["parent_span_id"] is None:  # root spans only, so nested time is not counted twice
+            by_session[record["attributes"].get("session.id", "(background)")] += record["duration_ms"]
+
+    print(f"{len(spans)} spans, {len(by_session)} sessions\n")
+    print("| Operation | Count | Errors | p50 (ms) | p95 (ms) | Max (ms) |")
+    print("|---|---|---|---|---|---|")
+    for name, durations in sorted(by_name.items(), key=lambda item: -sum(item[1])):
+        errors = sum(1 for record in spans if record["name"] == name and record["status"] == "ERROR")
+        p50, p95 = np.percentile(durations, [50, 95])
+        print(f"| {name} | {len(durations)} | {errors} | {p50:.1f} | {p95:.1f} | {max(durations):.1f} |")
+
+    print("\nSlowest sessions (total root span time):")
+    for session_id, total in sorted(by_session.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {total:10.1f} ms  {session_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Settings
+Configuration lookup shared by the app and the Airtable client: environment first, then Streamlit secrets
+"""
+
+import os
+
+import streamlit as st
+
+
+def setting(name: str, default=None):
+    """Environment variable, else Streamlit secret, else default (also when there is no secrets.toml)"""
+    try:
+        return os.getenv(name) or st.secrets.get(name, default)
+    except FileNotFoundError:  # StreamlitSecretNotFoundError
+        return default
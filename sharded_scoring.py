@@ -0,0 +1,248 @@
+"""
+Sharded Scoring
+Optional process pool that scores catalog shards in parallel over feature arrays held in shared memory
+"""
+
+import atexit
+import copy
+import os
+import pickle
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import streamlit as st
+from scipy import sparse
+
+from matching import MatchResult, candidate_rows, score_components, select_top_k, total_score
+from tracing import traced
+
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "0"))
+# Below this size, pickling shards costs more than scoring the catalog in-process
+SHARD_MIN_PROGRAMS = int(os.getenv("SHARD_MIN_PROGRAMS", "5000"))
+
+TERM_FIELDS = ("regions", "region_ids", "region_scopes", "applicants", "project_types", "themes", "stages")
+
+
+def _feature_arrays(catalog) -> dict:
+    """The catalog's numeric scoring arrays, keyed by where they live on a catalog"""
+    arrays = {}
+    for field in TERM_FIELDS:
+        arrays[f"{field}.masks"] = getattr(catalog, field).masks
+        arrays[f"{field}.present"] = getattr(catalog, field).present
+    arrays["max_amounts"] = catalog.max_amounts
+    arrays["deadlines"] = catalog.deadlines
+    matrix = catalog.text_index.matrix
+    arrays.update({"text.data": matrix.data, "text.indices": matrix.indices, "text.indptr": matrix.indptr})
+    return arrays
+
+
+def _skeleton(catalog) -> bytes:
+    """
+    Pickled catalog with only what scoring needs beyond the shared arrays: vocabularies, names and funders
+
+    The DataFrame, list columns, feature arrays, and the facet and amount indexes behind filtering
+    (which runs in the parent) are dropped.
+    """
+    skeleton = copy.copy(catalog)
+    skeleton.df = skeleton.list_columns = skeleton.ids = skeleton.positions = skeleton.calendar = skeleton.facets = None
+    skeleton.max_amounts = skeleton.deadlines = skeleton.amount_rows = skeleton.amount_sorted = None
+    for field in TERM_FIELDS:
+        term_sets = copy.copy(getattr(catalog, field))
+        term_sets.masks = term_sets.present = term_sets.postings = term_sets.open_rows = None
+        setattr(skeleton, field, term_sets)
+    skeleton.text_index = copy.copy(catalog.text_index)
+    skeleton.text_shape = catalog.text_index.matrix.shape
+    skeleton.text_index.matrix = None
+    return pickle.dumps(skeleton)
+
+
+def publish(catalog) -> tuple[shared_memory.SharedMemory, dict]:
+    """
+    Copy a catalog's feature arrays and skeleton into one shared memory block
+
+    Returns:
+        (SharedMemory block, layout of key -> (offset, dtype, shape)); the caller owns and unlinks the block
+    """
+    arrays = _feature_arrays(catalog)
+    arrays["skeleton"] = np.frombuffer(_skeleton(catalog), dtype=np.uint8)
+    layout, offset = {}, 0
+    for key, array in arrays.items():
+        layout[key] = (offset, array.dtype.str, array.shape)
+        offset += -(-array.nbytes // 8) * 8  # keep every array 8-byte aligned
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for key, array in arrays.items():
+        start, dtype, shape = layout[key]
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)[...] = array
+    return block, layout
+
+
+# Worker-side: the attached block and catalog view for the most recent catalog version
+_worker_view = {"version": None, "block": None, "catalog": None}
+
+
+def _attach(version: str, block_name: str, layout: dict):
+    """Catalog view over the shared block, rebuilt only when the catalog version changes"""
+    if _worker_view["version"] == version:
+        return _worker_view["catalog"]
+    if _worker_view["block"] is not None:
+        _worker_view["block"].close()
+    # Spawned workers share the parent's resource tracker, so attaching does not transfer ownership:
+    # the block is unlinked by the parent (or by the tracker when the server exits)
+    block = shared_memory.SharedMemory(name=block_name)
+
+    def view(key):
+        start, dtype, shape = layout[key]
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)
+
+    catalog = pickle.loads(view("skeleton").tobytes())
+    for field in TERM_FIELDS:
+        term_sets = getattr(catalog, field)
+        term_sets.masks, term_sets.present = view(f"{field}.masks"), view(f"{field}.present")
+    catalog.max_amounts, catalog.deadlines = view("max_amounts"), view("deadlines")
+    catalog.text_index.matrix = sparse.csc_matrix((view("text.data"), view("text.indices"), view("text.indptr")), shape=catalog.text_shape)
+    _worker_view.update(version=version, block=block, catalog=catalog)
+    return catalog
+
+
+def _score_shard(version: str, block_name: str, layout: dict, intake: dict, rows: np.ndarray, limit: int):
+    """Score one shard in a worker and return its local top `limit`: (rows, scores, breakdown arrays)"""
+    catalog = _attach(version, block_name, layout)
+    components = score_components(catalog, intake, rows)
+    scores = np.rint(total_score(components)).astype(int)
+    top = select_top_k(scores, catalog.names[rows], limit)
+    return rows[top], scores[top], {name: points[top] for name, points in components.items()}
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+@contextmanager
+def _spawn_main():
+    """
+    Point __main__ at this module while workers spawn
+
+    Spawned processes re-import the parent's __main__; under Streamlit that is the app
+    script, which must not run inside a worker.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+class ShardedScorer:
+    """
+    Persistent worker pool that ranks a catalog by splitting it into one shard per worker
+
+    Each catalog version is published once into shared memory, so a search only ships
+    the intake and each shard's row positions. Shards return their local top-K, which
+    the parent merges with the same ordering as select_top_k.
+    """
+
+    def __init__(self, workers: int = SCORING_WORKERS):
+        self.workers = workers
+        self.stats = {"searches": 0, "publishes": 0}
+        self._lock = threading.Lock()
+        # spawn: forking a threaded Streamlit server is unsafe
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+        with _spawn_main():
+            # Start every worker now (the pool otherwise spawns them lazily, outside _spawn_main)
+            for future in [self._pool.submit(_worker_ready) for _ in range(workers)]:
+                future.result()
+        self._current = None  # version of the latest published block
+        self._blocks = {}  # version -> [block, layout, searches in flight]
+        self.closed = False
+        atexit.register(self.close)
+
+    def close(self):
+        """Stop the workers and release every shared block"""
+        self._pool.shutdown(cancel_futures=True)
+        with self._lock:
+            self.closed = True
+            for block, _, _ in self._blocks.values():
+                block.close()
+                block.unlink()
+            self._blocks, self._current = {}, None
+
+    def _acquire(self, catalog) -> tuple[str, dict]:
+        """Publish the catalog's version if it is not the latest, and hold its block for one search"""
+        with self._lock:
+            if self._current != catalog.version:
+                previous, self._current = self._current, catalog.version
+                if catalog.version not in self._blocks:  # else still held by a search: reuse it
+                    self._blocks[catalog.version] = [*publish(catalog), 0]
+                    self.stats["publishes"] += 1
+                if previous is not None:
+                    self._unlink_if_idle(previous)
+            entry = self._blocks[catalog.version]
+            entry[2] += 1
+            return entry[0].name, entry[1]
+
+    def _release(self, version: str):
+        with self._lock:
+            if version in self._blocks:
+                self._blocks[version][2] -= 1
+                self._unlink_if_idle(version)
+
+    def _unlink_if_idle(self, version: str):
+        """
+        Unlink a superseded block once no search still has workers attaching to it (caller holds the lock)
+
+        Workers already attached keep their mapping until they move to the new version.
+        """
+        if version != self._current and self._blocks[version][2] == 0:
+            block = self._blocks.pop(version)[0]
+            block.close()
+            block.unlink()
+
+    @traced("scoring.sharded_rank")
+    def rank(self, catalog, intake: dict, limit: int, strict: bool = False, filters: dict | None = None) -> MatchResult:
+        """Same result as matching.rank_matches, scored across the worker pool"""
+        block_name, layout = self._acquire(catalog)
+        try:
+            rows = candidate_rows(catalog, intake, strict, filters)
+            shards = [shard for shard in np.array_split(rows, self.workers) if len(shard)]
+            futures = [self._pool.submit(_score_shard, catalog.version, block_name, layout, intake, shard, limit) for shard in shards]
+            parts = [future.result() for future in futures]
+        finally:
+            self._release(catalog.version)
+        self.stats["searches"] += 1
+
+        cand_rows = np.concatenate([part[0] for part in parts]) if parts else np.empty(0, dtype=np.intp)
+        cand_scores = np.concatenate([part[1] for part in parts]) if parts else np.empty(0, dtype=int)
+        top = select_top_k(cand_scores, catalog.names[cand_rows], limit)
+        breakdowns = {name: np.concatenate([part[2][name] for part in parts]) for name in (parts[0][2] if parts else {})}
+        return MatchResult(
+            catalog_version=catalog.version,
+            ids=[str(i) for i in catalog.ids[cand_rows[top]]],
+            scores=[int(s) for s in cand_scores[top]],
+            breakdowns=[{name: int(points[i]) for name, points in breakdowns.items()} for i in top],
+            total=len(rows),
+            strict=strict,
+            filters=filters,
+        )
+
+
+@st.cache_resource
+def sharded_scorer() -> ShardedScorer | None:
+    """The shared pool, or None when SCORING_WORKERS is below 2"""
+    return ShardedScorer() if SCORING_WORKERS >= 2 else None
+
+
+_discard_lock = threading.Lock()
+
+
+def discard_sharded_scorer(scorer: ShardedScorer):
+    """Close a broken pool (e.g. a worker was killed) so the next sharded_scorer() call starts a new one"""
+    with _discard_lock:
+        if scorer.closed:  # another session already replaced it
+            return
+        scorer.close()
+        sharded_scorer.clear()
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from catalog import FundingCatalog
+from matching import _score_region, eligible_rows
+
+REGIONS = {
+    "capital": ["Capital Regional District"],
+    "island": ["Vancouver Island"],
+    "bc": ["BC"],
+    "okanagan": ["Okanagan"],
+    "skeena": ["Skeena"],
+    "barkley": ["Barkley Sound"],
+    "vancouver": ["Metro Vancouver"],
+    "open": None,
+}
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    rows = [dict(id=name, Program_Name=name, Application_Deadline="Rolling", **({"Eligible_Regions": regions} if regions else {}))
+            for name, regions in REGIONS.items()]
+    return FundingCatalog(pd.DataFrame(rows))
+
+
+def region_scores(catalog, region):
+    return dict(zip(REGIONS, _score_region(catalog, {"region": region}, None).tolist()))
+
+
+@pytest.mark.parametrize("place, with_province", [("Sooke", "Sooke, BC"), ("Delta", "Delta, BC")])
+def test_naming_the_province_does_not_widen_the_region(catalog, place, with_province):
+    assert region_scores(catalog, with_province) == region_scores(catalog, place)
+
+
+def test_sooke_scores(catalog):
+    assert region_scores(catalog, "Sooke, BC") == {
+        "capital": 20, "island": 20, "bc": 20, "okanagan": 0, "skeena": 0, "barkley": 0, "vancouver": 0, "open": 12}
+
+
+def test_sub_region_programs_get_partial_credit_and_are_not_eligible(catalog):
+    scores = region_scores(catalog, "BC")
+    assert scores["okanagan"] == scores["barkley"] == 10
+    eligible = {catalog.df.iloc[row]["id"] for row in eligible_rows(catalog, {"region": "BC"})}
+    assert eligible == {"bc", "open"}
@@ -0,0 +1,70 @@
+"""
+Text Index
+BM25 index over program names and descriptions, scored locally against the user's project text
+"""
+
+import re
+
+import numpy as np
+from scipy import sparse
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to was were will with
+we you your program programs project projects funding fund grant grants support supports
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens of 3+ characters, minus stopwords"""
+    return [t for t in TOKEN_PATTERN.findall((text or "").lower()) if len(t) >= 3 and t not in STOPWORDS]
+
+
+class TextIndex:
+    """
+    Okapi BM25 weights for every (program, term) pair, held as a sparse matrix
+
+    Built once per catalog version. A query only sums the columns of its terms, so
+    scoring every program costs one sparse column slice instead of a scan of the text.
+    """
+
+    def __init__(self, documents: list, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            documents: One text per program, in catalog order
+            k1: Term-frequency saturation
+            b: Document-length normalization
+        """
+        self.vocabulary = {}
+        rows, cols, counts = [], [], []
+        lengths = np.zeros(len(documents), dtype=np.float64)
+        for row, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            terms, tf = np.unique([self.vocabulary.setdefault(t, len(self.vocabulary)) for t in tokens], return_counts=True)
+            rows.extend([row] * len(terms))
+            cols.extend(terms)
+            counts.extend(tf)
+
+        rows, cols, tf = np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32), np.array(counts, dtype=np.float64)
+        n_docs = max(len(documents), 1)
+        doc_freq = np.bincount(cols, minlength=len(self.vocabulary))
+        idf = np.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        norm = k1 * (1 - b + b * lengths / (lengths.mean() if lengths.any() else 1.0))
+        weights = idf[cols] * tf * (k1 + 1) / (tf + norm[rows])
+        # Column-major, since queries slice by term
+        self.matrix = sparse.csc_matrix((weights, (rows, cols)), shape=(len(documents), len(self.vocabulary)))
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def scores(self, query: str, rows=None) -> np.ndarray:
+        """BM25 score of every program (or `rows`) for the query's distinct known terms"""
+        terms = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not terms:
+            return np.zeros(len(self) if rows is None else len(rows))
+        scores = np.asarray(self.matrix[:, terms].sum(axis=1)).ravel()
+        return scores if rows is None else scores[rows]
+
+    def nbytes(self) -> int:
+        return self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
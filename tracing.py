@@ -0,0 +1,142 @@
+"""
+Tracing
+Lightweight spans around Airtable I/O, scoring and template work, exported as JSON lines per span
+"""
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+
+# Path of the JSONL span file (one OTLP-shaped span per line); unset disables tracing entirely
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACING = bool(TRACE_FILE)
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "ecoproject-navigator")
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+def _session_id() -> str | None:
+    """Streamlit session running this thread, or None on background threads"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+class JsonlExporter:
+    """Appends finished spans to a local file, one JSON object per line (safe across threads and processes)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            # One write per span: appends of a single short line do not interleave between processes
+            self._file.write(line)
+            self._file.flush()
+
+
+_exporter = JsonlExporter(TRACE_FILE) if TRACING else None
+
+
+class Span:
+    """
+    One timed operation; nested spans on the same thread share a trace id
+
+    Every span carries the Streamlit session id (when there is one) so a slow session
+    can be followed across Airtable calls, scoring and template work.
+    """
+
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id", "start_ns", "_token")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """Add attributes known only once the operation has run (status codes, sizes, cache hits)"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = secrets.token_hex(8)
+        session_id = parent.attributes.get("session.id") if parent is not None else _session_id()
+        if session_id is not None:
+            self.attributes.setdefault("session.id", session_id)
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attributes.update({"exception.type": exc_type.__name__, "exception.message": str(exc)[:200]})
+        _exporter.export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": end_ns,
+            "duration_ms": round((end_ns - self.start_ns) / 1e6, 3),
+            "status": "ERROR" if exc_type is not None else "OK",
+            "attributes": self.attributes,
+            "resource": {"service.name": SERVICE_NAME, "process.pid": os.getpid()},
+        })
+        return False
+
+
+class _NoopSpan:
+    """Shared stand-in when tracing is off: no ids, clocks or allocation per call"""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """
+    Context manager timing a block as a span
+
+    Args:
+        name: Operation name, dotted by area (e.g. "airtable.fetch_page")
+        **attributes: Span attributes known up front
+
+    Returns:
+        Span (or a no-op when TRACE_FILE is unset) supporting .set(**attributes)
+    """
+    return Span(name, attributes) if TRACING else _NOOP
+
+
+def traced(name: str):
+    """Decorator wrapping every call in a span; returns the function untouched when tracing is off"""
+    def decorate(fn):
+        if not TRACING:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate